@@ -0,0 +1,64 @@
+"""
+Compare save_tasks/load_tasks time and file size for each on-disk format.
+
+Usage:
+    python benchmarks/bench_formats.py [SIZES]
+
+SIZES is a comma-separated list of task counts (default 1000,100000,1000000).
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Insert project root into sys.path to enable importing modules from src/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.tasks import FILE_FORMATS, load_tasks, save_tasks
+
+CATEGORIES = ["Work", "Personal", "School", "Other"]
+PRIORITIES = ["High", "Medium", "Low"]
+
+# Build n tasks shaped like the ones the app creates
+def make_tasks(n):
+    start = date(2025, 1, 1)
+    return [
+        {
+            "id": i,
+            "title": f"Task {i}",
+            "description": f"Description for task number {i}",
+            "priority": PRIORITIES[i % 3],
+            "category": CATEGORIES[i % 4],
+            "due_date": (start + timedelta(days=i % 365)).strftime("%Y-%m-%d"),
+            "completed": i % 5 == 0,
+            "created_at": "2025-01-01 09:00:00",
+        }
+        for i in range(1, n + 1)
+    ]
+
+# Time one save and one load per format and report the resulting file size
+def bench(n, directory):
+    tasks = make_tasks(n)
+    rows = []
+    for fmt in FILE_FORMATS:
+        path = os.path.join(directory, f"tasks_{n}_{fmt}")
+        t0 = time.perf_counter()
+        save_tasks(tasks, file_path=path, engine="json", format=fmt)
+        t1 = time.perf_counter()
+        loaded = load_tasks(file_path=path, engine="json")
+        t2 = time.perf_counter()
+        assert loaded == tasks
+        rows.append((n, fmt, t1 - t0, t2 - t1, os.path.getsize(path)))
+    return rows
+
+def main(argv):
+    sizes = [int(s) for s in (argv[1] if len(argv) > 1 else "1000,100000,1000000").split(",")]
+    print(f"{'tasks':>9} {'format':>8} {'save s':>8} {'load s':>8} {'size MB':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for n in sizes:
+            for n_, fmt, save_s, load_s, size in bench(n, directory):
+                print(f"{n_:>9} {fmt:>8} {save_s:>8.3f} {load_s:>8.3f} {size / 1e6:>9.2f}")
+
+if __name__ == "__main__":
+    main(sys.argv)
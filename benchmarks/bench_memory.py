@@ -0,0 +1,50 @@
+"""
+Compare the memory held per task by dicts, Task records and a TaskTable.
+
+Usage:
+    python benchmarks/bench_memory.py [SIZES]
+
+SIZES is a comma-separated list of task counts (default 1000,100000,1000000).
+Tasks are decoded from JSON text, as load_tasks does, so no strings are
+shared between tasks unless the representation shares them.
+"""
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+# Insert project root into sys.path to enable importing modules from src/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bench_formats import make_tasks
+from src.tasks import Task, TaskTable
+
+REPRESENTATIONS = {
+    "dict": json.loads,
+    "Task": lambda text: [Task.from_dict(t) for t in json.loads(text)],
+    "TaskTable": lambda text: TaskTable(json.loads(text)),
+}
+
+# Return the bytes still allocated after build(text) returns, and its result
+def retained(build, text):
+    gc.collect()
+    tracemalloc.start()
+    result = build(text)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+def main(argv):
+    sizes = [int(s) for s in (argv[1] if len(argv) > 1 else "1000,100000,1000000").split(",")]
+    print(f"{'tasks':>9} {'representation':>15} {'MB':>9} {'bytes/task':>11}")
+    for n in sizes:
+        text = json.dumps(make_tasks(n))
+        for name, build in REPRESENTATIONS.items():
+            size, result = retained(build, text)
+            del result
+            print(f"{n:>9} {name:>15} {size / 1e6:>9.1f} {size / n:>11.0f}")
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -2,6 +2,7 @@ import sys
 import os
 import subprocess
 import streamlit as st
+from contextlib import nullcontext
 from datetime import datetime
 # Insert project root into sys.path to enable importing modules from src/
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -9,28 +10,98 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 from src.tasks import (
     load_tasks,
     save_tasks,
-    filter_tasks_by_priority,
-    filter_tasks_by_category,
+    append_task_change,
+    get_storage_engine,
+    get_store_path,
+    TaskStore,
+    DEFAULT_FLUSH_MS,
+    open_task_db,
+    TaskDatabase,
+    TaskList,
+    is_stale,
+    find_task,
     generate_unique_id,
+    reserve_task_id,
     edit_task,
-    is_task_overdue,
-    sort_tasks_by_due_date,
+    get_categories,
+    get_task_counts,
+    get_completion_history,
+    get_task_page,
+    toggle_completed,
+    validate_task_record,
+    apply_task_changes,
+    bulk_update,
+    bulk_delete,
+    bulk_delete_where,
+    delete_task as delete_stored_task,
 )
 
 # Initialize edit_id in session_state to track task being edited
 if not hasattr(st.session_state, "edit_id"):
     st.session_state.edit_id = None
 
+# Tasks rendered per page unless the user picks another page size
+DEFAULT_PAGE_SIZE = 25
+
+# Seconds between checks for changes other sessions made to the shared store
+STORE_POLL_SECONDS = 5
+
+# Columns shown in table mode; the read-only id maps edited rows back to tasks
+TABLE_COLUMNS = ("id", "completed", "title", "description", "category", "priority", "due_date")
+
+# Return st.session_state.tasks as a TaskList, upgrading a plain list once
+def session_task_list():
+    store = getattr(st.session_state, "task_store", None)
+    if store is not None:
+        st.session_state.tasks = store.tasks
+    tasks = st.session_state.tasks
+    if not isinstance(tasks, TaskList):
+        tasks = TaskList(tasks)
+        st.session_state.tasks = tasks
+    return tasks
+
+# One task store per server process and store file, shared by every browser session;
+# clicks change it in memory and a background thread coalesces the writes
+@st.cache_resource
+def shared_task_store(file_path, engine):
+    return TaskStore(file_path, engine, flush_ms=DEFAULT_FLUSH_MS)
+
+# Rerun the page once another session has changed the shared store
+def watch_shared_store(store, rendered_version):  # pragma: no cover
+    if store.version != rendered_version:
+        st.rerun()
+
+if hasattr(st, "fragment"):
+    watch_shared_store = st.fragment(run_every=STORE_POLL_SECONDS)(watch_shared_store)
+
+# Hold the shared store's lock while changing the session tasks, if a store is in use
+def session_store_lock():
+    store = getattr(st.session_state, "task_store", None)
+    return store.lock if store is not None else nullcontext()
+
+# Return the session TaskList that storage calls change in place while it is in sync
+def synced_session_tasks():
+    store = getattr(st.session_state, "task_store", None)
+    if store is not None:
+        st.session_state.tasks = store.tasks
+    tasks = getattr(st.session_state, "tasks", None)
+    return tasks if isinstance(tasks, TaskList) else None
+
 # Begin edit mode: store original task data and remove it from main list
 def start_edit(task_id):
     """Set task to edit and remove original immediately."""
     tasks = st.session_state.tasks
-    original = next((t for t in tasks if t["id"] == task_id), None)
+    original = find_task(tasks, task_id)
     if original is not None:
         st.session_state.edit_task_data = original.copy()
-        new_tasks = [t for t in tasks if t["id"] != task_id]
-        st.session_state.tasks = new_tasks
-        save_tasks(new_tasks)
+        if isinstance(tasks, TaskDatabase):
+            tasks.delete(task_id)
+        else:
+            with session_store_lock():
+                tasks = session_task_list()
+                tasks.remove_by_id(task_id)
+                if not append_task_change("delete", {"id": task_id}, tasks=tasks):
+                    save_tasks(tasks)
     st.session_state.edit_id = task_id
 
 # Save edits to task by updating session_state and writing to file
@@ -53,9 +124,14 @@ def save_edit(task_id):
     original = st.session_state.edit_task_data
     updated_task = original.copy()
     updated_task.update(updates)
-    tasks_list = st.session_state.tasks + [updated_task]
-    st.session_state.tasks = tasks_list
-    save_tasks(tasks_list)
+    if isinstance(st.session_state.tasks, TaskDatabase):
+        st.session_state.tasks.insert(updated_task)
+    else:
+        with session_store_lock():
+            tasks_list = session_task_list()
+            tasks_list.append(updated_task)
+            if not append_task_change("add", updated_task, tasks=tasks_list):
+                save_tasks(tasks_list)
     st.session_state.edit_id = None
     # Support attribute-based session_state for edit_task_data
     if hasattr(st.session_state, "edit_task_data"):
@@ -65,10 +141,10 @@ def save_edit(task_id):
         rerun()
 
 # Construct a new task dict with a unique ID and timestamp
-def build_task(tasks, title, description, priority, category, due_date):
-    """Construct a task dict with a unique ID and timestamp."""
+def build_task(tasks, title, description, priority, category, due_date, task_id=None):
+    """Construct a task dict with a unique ID (task_id if given) and timestamp."""
     return {
-        "id": generate_unique_id(tasks),
+        "id": generate_unique_id(tasks) if task_id is None else task_id,
         "title": title,
         "description": description,
         "priority": priority,
@@ -78,35 +154,127 @@ def build_task(tasks, title, description, priority, category, due_date):
         "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
     }
 
+# Replace or drop a task in st.session_state.tasks without reloading from disk
+def patch_session_task(task_id, updated=None):
+    if not isinstance(getattr(st.session_state, "tasks", None), list):
+        return
+    tasks = session_task_list()
+    if updated is None:
+        tasks.remove_by_id(task_id)
+    elif tasks.get(task_id) is not None:
+        tasks.put(updated)
+
 # Toggle completion status of a task and persist changes
 def complete_task(task_id):
-    tasks = load_tasks()
-    for t in tasks:
-        if t["id"] == task_id:
-            t["completed"] = not t["completed"]
-    save_tasks(tasks)
+    with session_store_lock():
+        updated = toggle_completed(task_id, tasks=synced_session_tasks())
+        if updated is not None:
+            patch_session_task(task_id, updated)
 
 # Remove a task by ID from storage
 def delete_task(task_id):
-    tasks = load_tasks()
-    save_tasks([t for t in tasks if t["id"] != task_id])
+    with session_store_lock():
+        if delete_stored_task(task_id, tasks=synced_session_tasks()) is not None:
+            patch_session_task(task_id)
+
+# Drop many tasks from st.session_state.tasks in one pass
+# Nothing is left to drop when storage already changed the session list in place
+def drop_session_tasks(task_ids):
+    if not isinstance(getattr(st.session_state, "tasks", None), list):
+        return
+    tasks = session_task_list()
+    task_ids = {task_id for task_id in task_ids if tasks.get(task_id) is not None}
+    if task_ids:
+        tasks.remove_where(lambda t: t.get("id") in task_ids)
+
+# Merge the same fields into every selected task with one write
+def bulk_update_tasks(task_ids, fields):
+    with session_store_lock():
+        for task in bulk_update(task_ids, fields, tasks=synced_session_tasks()):
+            patch_session_task(task["id"], task)
+
+# Delete every selected task with one write
+def bulk_delete_tasks(task_ids):
+    with session_store_lock():
+        drop_session_tasks(task["id"] for task in bulk_delete(task_ids, tasks=synced_session_tasks()))
+
+# Delete all completed tasks with one write
+def clear_completed_tasks():
+    with session_store_lock():
+        completed = bulk_delete_where(lambda t: t.get("completed", False), tasks=synced_session_tasks())
+        drop_session_tasks(task["id"] for task in completed)
+
+# Persist the table editor's edited rows with one apply_task_changes call
+# Rows that fail validate_task_record are reported and left unchanged
+def apply_table_edits(key, task_ids):
+    edited_rows = st.session_state[key]["edited_rows"]
+    changes = {}
+    with session_store_lock():
+        tasks = synced_session_tasks()
+        for row, fields in edited_rows.items():
+            task = find_task(tasks, task_ids[int(row)])
+            if not fields or task is None:
+                continue
+            fields = {k: v.isoformat()[:10] if hasattr(v, "isoformat") else v for k, v in fields.items()}
+            try:
+                record = validate_task_record({**task, **fields})
+            except ValueError as e:
+                st.error(f"Row {int(row) + 1} not saved: {e}")
+                continue
+            changes[task["id"]] = {k: record.get(k, v) for k, v in fields.items()}
+        if changes:
+            for task in apply_task_changes(changes, tasks=tasks):
+                patch_session_task(task["id"], task)
+    return changes
 
 # Prepare available categories and priorities for UI filters
 def get_filter_options(tasks):
-    categories = sorted({task["category"] for task in tasks})
+    categories = get_categories(tasks)
     priorities = ["High", "Medium", "Low"]
     return categories, priorities
 
 # Process sidebar form submission to add a new task
 def handle_new_task(tasks, submitted, title, desc, priority, category, due_date):
     if submitted and title:
-        new = build_task(tasks, title, desc, priority, category, due_date)
-        tasks.append(new)
-        save_tasks(tasks)
+        if isinstance(tasks, TaskDatabase):
+            new = build_task(tasks, title, desc, priority, category, due_date, reserve_task_id(tasks))
+            tasks.insert(new)
+            return new
+        # The id is reserved from the store's counter, so no session or process reuses it
+        store = getattr(st.session_state, "task_store", None)
+        with session_store_lock():
+            if store is not None:
+                task_id = reserve_task_id(tasks, store.file_path, store.engine)
+            else:
+                task_id = reserve_task_id(tasks)
+            new = build_task(tasks, title, desc, priority, category, due_date, task_id)
+            tasks.append(new)
+            if not append_task_change("add", new, tasks=tasks):
+                save_tasks(tasks)
         st.session_state.tasks = tasks
         return new
     return None
 
+# Slice one page out of (title, tasks) sections laid end to end in display order
+def paginate_sections(sections, page, page_size):
+    start, stop = (page - 1) * page_size, page * page_size
+    visible = []
+    for title, items in sections:
+        if items and start < len(items) and stop > 0:
+            visible.append((title, items[max(start, 0):stop]))
+        start -= len(items)
+        stop -= len(items)
+    return visible
+
+# Render page size and page number inputs with a count summary; return the page to show
+def show_pagination(total):  # pragma: no cover
+    page_size = int(st.number_input("Tasks per page", min_value=1, value=DEFAULT_PAGE_SIZE, step=5, key="page_size"))
+    pages = max(1, -(-total // page_size))
+    page = min(max(int(st.number_input("Page", min_value=1, value=1, step=1, key="page")), 1), pages)
+    first = (page - 1) * page_size + 1 if total else 0
+    st.caption(f"Showing {first}-{min(page * page_size, total)} of {total} tasks (page {page} of {pages})")
+    return page, page_size
+
 # Return filter settings unchanged (placeholder for future logic)
 def compute_filters(selected_category, selected_priority, show_completed):
     return selected_category, selected_priority, show_completed
@@ -136,16 +304,82 @@ def show_sidebar(tasks):  # pragma: no cover
     if new_task:
         st.sidebar.success("Task added!")
 
+# Render counts by category, priority, completion and overdue status on request;
+# a TaskList keeps them as running counters, so this does not scan the tasks
+def show_task_report(tasks):  # pragma: no cover
+    if not hasattr(st.sidebar, "checkbox") or not st.sidebar.checkbox("Show Report"):
+        return
+    with session_store_lock():
+        counts = get_task_counts(tasks)
+        history = get_completion_history(tasks)
+    st.sidebar.header("Report")
+    st.sidebar.metric("Tasks", counts.total)
+    st.sidebar.metric("Completed", counts.completed)
+    st.sidebar.metric("Overdue", counts.overdue)
+    if counts.by_category:
+        st.sidebar.bar_chart({"Tasks": counts.by_category})
+    if counts.by_priority:
+        st.sidebar.bar_chart({"Tasks": counts.by_priority})
+    if history:
+        st.sidebar.caption("Completion rate by creation day")
+        st.sidebar.line_chart({"Completed": {day: done / created for day, created, done in history}})
+
 # Render category/priority filters and return user's choices
 def show_filters(tasks):  # pragma: no cover
     col1, col2 = st.columns(2)
     with col1:
-        cat = st.selectbox("Category", ["All"] + list({t["category"] for t in tasks}))
+        categories, _ = get_filter_options(tasks)
+        cat = st.selectbox("Category", ["All"] + categories)
     with col2:
         pri = st.selectbox("Priority", ["All", "High", "Medium", "Low"])
     show_done = st.checkbox("Show Completed Tasks")
     return compute_filters(cat, pri, show_done)
 
+# Render a multiselect over the shown tasks with buttons acting on all selected at once
+def show_bulk_actions(tasks):  # pragma: no cover
+    with st.expander("Bulk Actions", expanded=False):
+        titles = {task["id"]: task["title"] for task in tasks}
+        selected = st.multiselect("Select Tasks", list(titles), format_func=lambda i: titles.get(i, str(i)))
+        priority = st.selectbox("New Priority", ["Low", "Medium", "High"])
+        cols = st.columns(2)
+        with cols[0]:
+            st.button("Complete Selected", on_click=bulk_update_tasks, args=(selected, {"completed": True}))
+            st.button("Set Priority", on_click=bulk_update_tasks, args=(selected, {"priority": priority}))
+        with cols[1]:
+            st.button("Delete Selected", on_click=bulk_delete_tasks, args=(selected,))
+            st.button("Clear Completed", on_click=clear_completed_tasks)
+
+# Render tasks as one editable table whose edits are saved in a single batch
+def render_task_table(tasks):  # pragma: no cover
+    key = "task_table"
+    rows = [{column: task.get(column) for column in TABLE_COLUMNS} for task in tasks]
+    for row in rows:
+        try:
+            row["due_date"] = datetime.strptime(row["due_date"], "%Y-%m-%d").date()
+        except (TypeError, ValueError):
+            row["due_date"] = None
+    with st.form("task_table_form"):
+        st.data_editor(
+            rows,
+            key=key,
+            disabled=["id"],
+            hide_index=True,
+            column_config={
+                "completed": st.column_config.CheckboxColumn("Done"),
+                "title": st.column_config.TextColumn("Title", required=True),
+                "category": st.column_config.SelectboxColumn(
+                    "Category", options=["Work", "Personal", "School", "Other"], required=True
+                ),
+                "priority": st.column_config.SelectboxColumn(
+                    "Priority", options=["Low", "Medium", "High"], required=True
+                ),
+                "due_date": st.column_config.DateColumn("Due", format="YYYY-MM-DD", required=True),
+            },
+        )
+        st.form_submit_button(
+            "Save Changes", on_click=apply_table_edits, args=(key, [task["id"] for task in tasks])
+        )
+
 # Display a single task entry with action buttons and overdue styling
 def render_task(task, overdue=False):
     cols = st.columns([4, 1])
@@ -361,10 +595,30 @@ def main():  # pragma: no cover
 
     # Persist tasks safely
     if not hasattr(st.session_state, "tasks"):
+        # The sqlite engine is queried per page instead of loaded up front
+        if get_storage_engine() == "sqlite":
+            st.session_state.tasks = open_task_db()
+        else:
+            # Sessions share one lock-protected list instead of each loading a copy
+            store = shared_task_store(get_store_path(), get_storage_engine())
+            st.session_state.task_store = store
+            st.session_state.tasks = store.tasks
+    elif getattr(st.session_state, "task_store", None) is None and is_stale(st.session_state.tasks):
+        # Session changes write through; only a write from elsewhere forces a re-read
         st.session_state.tasks = load_tasks()
     tasks = st.session_state.tasks
+    if isinstance(tasks, list):
+        tasks = session_task_list()
+    # Report a failed background write once; the writer keeps retrying pending changes
+    store = getattr(st.session_state, "task_store", None)
+    if store is not None and store.error is not None:
+        with store.lock:
+            error, store.error = store.error, None
+        if error is not None:
+            st.error(f"Saving tasks failed: {error}")
 
     show_sidebar(tasks)
+    show_task_report(tasks)
     st.header("Your Tasks")
 
     html_style = """
@@ -378,17 +632,20 @@ def main():  # pragma: no cover
         st.markdown(html_style)
 
     cat, pri, show_done = show_filters(tasks)
-    filtered = tasks.copy()
-    if cat != "All":
-        filtered = filter_tasks_by_category(filtered, cat)
-    if pri != "All":
-        filtered = filter_tasks_by_priority(filtered, pri)
-    if not show_done:
-        filtered = [t for t in filtered if not t["completed"]]
-
     sort_option = st.selectbox("Sort by Due Date", ["Ascending", "Descending"])
     ascending = sort_option == "Ascending"
-    filtered = sort_tasks_by_due_date(filtered, ascending=ascending)
+    search = st.text_input("Search Tasks")
+    state = st.session_state
+    page = int(getattr(state, "page", 1))
+    page_size = int(getattr(state, "page_size", DEFAULT_PAGE_SIZE))
+    filters = dict(category=cat, priority=pri, show_completed=show_done, ascending=ascending, search=search)
+    with session_store_lock():
+        # Only the total and the tasks of this page are computed: a COUNT(*)
+        # and a LIMIT/OFFSET query on sqlite, index counts and next_due on a
+        # TaskList, memoized until the task list changes
+        total, *sections = get_task_page(tasks, page, page_size, **filters)
+        store = getattr(st.session_state, "task_store", None)
+        rendered_version = store.version if store is not None else None
 
     if st.session_state.edit_id:
         task_to_edit = st.session_state.edit_task_data
@@ -415,18 +672,23 @@ def main():  # pragma: no cover
             )
             st.form_submit_button("Save Changes", on_click=save_edit, args=(task_to_edit["id"],))
 
-    overdue = [t for t in filtered if is_task_overdue(t)]
-    upcoming = [t for t in filtered if not is_task_overdue(t)]
-
-    if overdue:
-        st.subheader("Overdue Tasks")
-        for t in overdue:
-            render_task(t, overdue=True)
-
-    if upcoming:
-        st.subheader("Upcoming Tasks")
-        for t in upcoming:
-            render_task(t)
+    # Only the visible page becomes widgets; table mode makes it a single widget
+    table_mode = st.checkbox("Table Mode")
+    page, page_size = show_pagination(total)
+    sections = list(zip(("Overdue Tasks", "Due Today", "Upcoming Tasks"), sections))
+    # The sections hold only the tasks of this page already
+    visible = paginate_sections(sections, 1, page_size)
+    show_bulk_actions([t for _, page_tasks in visible for t in page_tasks])
+    if table_mode and visible:
+        render_task_table([t for _, page_tasks in visible for t in page_tasks])
+    elif not table_mode:
+        for title, page_tasks in visible:
+            st.subheader(title)
+            for t in page_tasks:
+                render_task(t, overdue=title == "Overdue Tasks")
+
+    if store is not None:
+        watch_shared_store(store, rendered_version)
 
     with st.expander("Legacy Test Buttons", expanded=False):
         st.write("<small>Use only if necessary</small>", unsafe_allow_html=True)
@@ -1,73 +1,2749 @@
+import atexit
+import csv
+import heapq
+import io
 import json
+import mmap
+import operator
 import os
-from datetime import datetime
+import re
+import shutil
+import sqlite3
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, namedtuple
+from collections.abc import MutableMapping, MutableSequence
+from contextlib import closing, contextmanager, nullcontext
+from datetime import date, datetime, timedelta
+from itertools import accumulate, chain, compress, groupby, islice
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy ships with streamlit
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
 
 # File path for task storage
 DEFAULT_TASKS_FILE = "tasks.json"
 
-def load_tasks(file_path=None):
+# Database path used by the sqlite storage engine
+DEFAULT_TASKS_DB = "tasks.db"
+
+# Storage engine used by load_tasks/save_tasks: "json" rewrites the whole file,
+# "journal" keeps a snapshot plus an append-only operation log next to it and
+# "sqlite" keeps one indexed row per task in DEFAULT_TASKS_DB
+DEFAULT_STORAGE_ENGINE = "json"
+STORAGE_ENGINES = ("json", "journal", "sqlite")
+
+# Journal file suffix and the minimum log size (bytes) before compaction
+JOURNAL_SUFFIX = ".log"
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+# On-disk format written by save_tasks for the json and journal engines:
+# "pretty" (indented JSON), "compact" (JSON without whitespace) or "binary"
+# (struct-packed records); load_tasks detects the format by itself
+DEFAULT_FILE_FORMAT = "pretty"
+FILE_FORMATS = ("pretty", "compact", "binary")
+
+# Binary files start with this marker and store tasks column by column in
+# segments of at most BINARY_SEGMENT_ROWS tasks; values of the interned
+# fields repeat across tasks, so they are stored once in a string table
+BINARY_MAGIC = b"TSKC"
+BINARY_SEGMENT_ROWS = 65536
+INTERNED_FIELDS = ("priority", "category", "due_date")
+_U32 = struct.Struct("<I")
+
+# Sidecar file holding store metadata (the next task id) for file engines
+META_SUFFIX = ".meta"
+
+# Sidecar file locked by writers of a file store, and the copy kept of a
+# store that could not be read
+LOCK_SUFFIX = ".lock"
+CORRUPT_SUFFIX = ".corrupt"
+
+# Task fields TaskList keeps value -> ids indexes for
+INDEXED_FIELDS = ("category", "priority", "completed")
+
+# Search tokens are lowercase word runs; a title hit outweighs a description hit
+_TOKEN_RE = re.compile(r"\w+")
+SEARCH_TITLE_WEIGHT = 3
+
+# Derived views memoized per TaskList version before the cache is reset
+VIEW_CACHE_SIZE = 32
+
+# Default milliseconds a TaskStore writer waits to coalesce changes before a flush
+DEFAULT_FLUSH_MS = 250
+
+# Tasks split around today's date by partition_by_due
+DuePartition = namedtuple("DuePartition", "overdue due_today upcoming")
+
+# Aggregate counts of a task set, as returned by TaskColumns.counts
+TaskCounts = namedtuple("TaskCounts", "total completed overdue by_category by_priority")
+
+# The filtered tasks of the main page, split like DuePartition
+TaskView = namedtuple("TaskView", "filtered overdue due_today upcoming")
+
+# One page of the main view from get_task_page: the match count and the page split like DuePartition
+TaskPage = namedtuple("TaskPage", "total overdue due_today upcoming")
+
+# Task fields in the order build_task creates them, used for CSV columns
+TASK_FIELDS = ("id", "title", "description", "priority", "category", "due_date", "completed", "created_at")
+TASK_PRIORITIES = ("High", "Medium", "Low")
+
+# Priority -> position in TASK_PRIORITIES, so "High" sorts first; unknown priorities sort last
+PRIORITY_RANK = {p: i for i, p in enumerate(TASK_PRIORITIES)}
+
+# Characters read per step by iter_tasks, and what may separate array items
+ITER_CHUNK_SIZE = 64 * 1024
+_JSON_SEPARATORS = re.compile(r"[\s,]*")
+
+# Formats understood by import_tasks/export_tasks, and records per import chunk
+TRANSFER_FORMATS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv"}
+IMPORT_CHUNK_SIZE = 1000
+
+def _resolve_engine(engine):
+    """Return the storage engine to use, validating its name."""
+    if engine is None:
+        engine = DEFAULT_STORAGE_ENGINE
+    if engine not in STORAGE_ENGINES:
+        raise ValueError(f"Unknown storage engine: {engine}")
+    return engine
+
+def _default_path(file_path, engine):
+    """Return file_path, or the default file for the given engine."""
+    if file_path is not None:
+        return file_path
+    return DEFAULT_TASKS_DB if engine == "sqlite" else DEFAULT_TASKS_FILE
+
+def get_storage_engine():
+    """Return the storage engine currently configured for the app."""
+    return _resolve_engine(None)
+
+def get_store_path(engine=None):
+    """Return the default file (or database) of the given storage engine."""
+    return _default_path(None, _resolve_engine(engine))
+
+class TaskConflictError(RuntimeError):
+    """
+    Raised by save_tasks when the store changed since the tasks were loaded,
+    and by TaskDatabase.insert when the new task's id is already taken.
+    """
+
+# Per-path [thread lock, locked file, depth]; the file lock is taken once per
+# process and the thread lock makes it re-entrant for nested store calls
+_FILE_LOCKS = {}
+_FILE_LOCKS_GUARD = threading.Lock()
+
+@contextmanager
+def _locked(file_path):
+    """Hold the store's lock file, excluding writers in other threads and processes."""
+    lock_path = os.path.abspath(file_path) + LOCK_SUFFIX
+    with _FILE_LOCKS_GUARD:
+        entry = _FILE_LOCKS.setdefault(lock_path, [threading.RLock(), None, 0])
+    with entry[0]:
+        if entry[2] == 0:
+            f = open(lock_path, "a+b")
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:  # pragma: no cover - Windows
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            entry[1] = f
+        entry[2] += 1
+        try:
+            yield
+        finally:
+            entry[2] -= 1
+            if entry[2] == 0:
+                # Closing the file releases the lock
+                entry[1].close()
+                entry[1] = None
+
+def _create_temp(directory, name):
+    """
+    Create a new temporary file for name in directory; return (fd, path).
+    
+    Unlike tempfile.mkstemp (mode 0o600) it is created like open() creates
+    files, mode 0o666 less the umask, without reading the process umask.
+    """
+    while True:
+        tmp_path = os.path.join(directory, f"{name}.{os.urandom(4).hex()}.tmp")
+        try:
+            return os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666), tmp_path
+        except FileExistsError:
+            continue
+
+@contextmanager
+def _atomic_open(file_path, mode="w"):
+    """
+    Open a temporary file that replaces file_path once the block succeeds.
+    
+    The data is fsynced before the rename, so readers and crashes see either
+    the old file or the complete new one, never a truncated one.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = _create_temp(directory, os.path.basename(file_path))
+    try:
+        try:
+            os.chmod(tmp_path, os.stat(file_path).st_mode & 0o7777)
+        except FileNotFoundError:
+            # A new file keeps the mode open() gave the temporary file
+            pass
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    if os.name == "posix":
+        # Persist the rename itself
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def load_tasks(file_path=None, engine=None):
+    """
+    Load tasks from a JSON file.
+    
+    Args:
+        file_path (str): Path to the JSON file (or database) containing tasks
+        engine (str): Storage engine, "json", "journal" or "sqlite" (default DEFAULT_STORAGE_ENGINE)
+        
+    Returns:
+        TaskList: List of task dictionaries, empty list if file doesn't exist
+    """
+    engine = _resolve_engine(engine)
+    file_path = _default_path(file_path, engine)
+    # Taken before reading, so a write racing the read makes the list stale
+    signature = store_signature(file_path, engine)
+    if engine == "sqlite":
+        db = TaskDatabase(file_path)
+        tasks = TaskList(db)
+        tasks.next_id = max(tasks.next_id, db.next_id())
+    else:
+        if engine == "journal":
+            tasks = _replay_journal(_read_snapshot(file_path), file_path)
+        else:
+            tasks = TaskList(_read_snapshot(file_path))
+        tasks.next_id = max(tasks.next_id, _read_meta(file_path).get("next_id", 1))
+    tasks.signature = signature
+    return tasks
+
+def store_signature(file_path=None, engine=None):
+    """
+    Return the path, modification time and size of the files behind a store.
+    
+    Two equal signatures mean the store was not written in between, which
+    is checked with a stat() instead of a read.
+    """
+    engine = _resolve_engine(engine)
+    file_path = _default_path(file_path, engine)
+    paths = [file_path, _journal_path(file_path)] if engine == "journal" else [file_path]
+    signature = [os.path.abspath(file_path)]
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            signature.append(None)
+        else:
+            signature.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+def is_stale(tasks, file_path=None, engine=None):
+    """
+    Return True if the store changed since tasks was loaded from or written to it.
+    
+    Lists built in memory have no signature and are never stale, and neither
+    are lists loaded from a different store, so they can be saved as a copy.
+    """
+    signature = getattr(tasks, "signature", None)
+    current = store_signature(file_path, engine)
+    return signature is not None and signature[0] == current[0] and signature != current
+
+def _in_sync(tasks, file_path, engine):
+    """Return True if tasks is a TaskList holding exactly what the store holds."""
+    return (
+        isinstance(tasks, TaskList)
+        and tasks.signature is not None
+        and tasks.signature == store_signature(file_path, engine)
+    )
+
+def _synced_or_load(tasks, file_path, engine):
+    """Return tasks to change in place while it is in sync, else a fresh load."""
+    # A background writer reloads stale lists itself and replays its changes
+    if _written_behind(tasks, file_path) or _in_sync(tasks, file_path, engine):
+        return tasks
+    return load_tasks(file_path, engine)
+
+def _written_behind(tasks, file_path):
+    """Return True if tasks has a background writer (see TaskStore) for file_path."""
+    writer = getattr(tasks, "writer", None)
+    return writer is not None and writer.file_path == file_path
+
+def _locked_for(tasks, file_path):
+    """Lock file_path for a change to tasks, unless its background writer persists it later."""
+    return nullcontext() if _written_behind(tasks, file_path) else _locked(file_path)
+
+def _deferred(tasks, file_path, task_ids):
+    """Leave a change to task_ids to tasks' background writer, if it has one for file_path."""
+    if not _written_behind(tasks, file_path):
+        return False
+    tasks.writer.mark_dirty(task_ids)
+    return True
+
+def _read_snapshot(file_path):
+    """Read the task list at file_path in any file format, or [] if it is corrupted."""
+    try:
+        with open(file_path, "rb") as f:
+            if f.read(len(BINARY_MAGIC)) == BINARY_MAGIC:
+                tasks = []
+                for segment in _iter_binary_file(f):
+                    tasks.extend(segment)
+                return tasks
+            f.seek(0)
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+    except json.JSONDecodeError:
+        problem = "invalid JSON"
+    except ValueError:
+        problem = "invalid task data"
+    # Leave the file alone, but keep a copy in case the next save replaces it
+    backup_path = file_path + CORRUPT_SUFFIX
+    shutil.copyfile(file_path, backup_path)
+    print(f"Warning: {file_path} contains {problem}. Starting an empty tasks list; a copy is kept at {backup_path}.")
+    return []
+
+def _pack_str(buf, text):
+    data = text.encode("utf-8")
+    buf += _U32.pack(len(data))
+    buf += data
+
+def _pack_array(buf, typecode, values):
+    data = array(typecode, values)
+    if sys.byteorder == "big":
+        data.byteswap()
+    buf += data.tobytes()
+
+def _unpack_array(data, typecode):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tolist()
+
+def _encode_binary(tasks):
+    """
+    Pack tasks into the columnar binary file format.
+    
+    Layout (little endian): BINARY_MAGIC; the interned string table; then
+    segments of consecutive tasks sharing the same keys. Each segment holds
+    its row count, its keys and one column per key, tagged by kind:
+    0 bools (one byte each), 1 int64s, 2 interned string indexes (uint32),
+    3 strings and 4 any other JSON values (a UTF-8 blob plus the length of
+    every value in characters). Whole columns decode with one array or
+    bytes operation instead of a Python call per field.
+    """
+    strings = {}
+    segments = []
+    for keys, run in groupby(tasks, key=lambda t: tuple(t)):
+        run = list(run)
+        for start in range(0, len(run), BINARY_SEGMENT_ROWS):
+            segments.append((keys, run[start:start + BINARY_SEGMENT_ROWS]))
+    body = bytearray()
+    for keys, rows in segments:
+        body += _U32.pack(len(rows))
+        body += _U32.pack(len(keys))
+        for key in keys:
+            _pack_str(body, str(key))
+            column = [t[key] for t in rows]
+            types = {type(v) for v in column}
+            if types == {bool}:
+                body.append(0)
+                body += bytes(column)
+            elif types == {int} and all(-(1 << 63) <= v < (1 << 63) for v in column):
+                body.append(1)
+                _pack_array(body, "q", column)
+            elif types == {str} and key in INTERNED_FIELDS:
+                body.append(2)
+                _pack_array(body, "I", (strings.setdefault(v, len(strings)) for v in column))
+            else:
+                if types != {str}:
+                    body.append(4)
+                    column = [json.dumps(v) for v in column]
+                else:
+                    body.append(3)
+                _pack_str(body, "".join(column))
+                _pack_array(body, "I", (len(v) for v in column))
+    out = bytearray(BINARY_MAGIC)
+    out += _U32.pack(len(strings))
+    for text in strings:
+        _pack_str(out, text)
+    out += _U32.pack(len(segments))
+    out += body
+    return bytes(out)
+
+def _iter_binary_segments(buf, pos):
+    """Yield lists of tasks, one per segment, from binary data in buf after BINARY_MAGIC."""
+    def take(n):
+        nonlocal pos
+        if pos + n > len(buf):
+            raise ValueError("Truncated binary task file")
+        pos += n
+        return buf[pos - n:pos]
+
+    def read_u32():
+        return _U32.unpack(take(4))[0]
+
+    def read_str():
+        return str(take(read_u32()), "utf-8")
+
+    def read_joined(n):
+        text = read_str()
+        ends = list(accumulate(_unpack_array(take(4 * n), "I")))
+        if ends and ends[-1] != len(text):
+            raise ValueError("Corrupt string column in binary task file")
+        return [text[a:b] for a, b in zip([0] + ends, ends)]
+
+    strings = [read_str() for _ in range(read_u32())]
+    for _ in range(read_u32()):
+        n = read_u32()
+        keys, columns = [], []
+        for _ in range(read_u32()):
+            keys.append(read_str())
+            kind = take(1)[0]
+            if kind == 0:
+                columns.append([b == 1 for b in take(n)])
+            elif kind == 1:
+                columns.append(_unpack_array(take(8 * n), "q"))
+            elif kind == 2:
+                try:
+                    columns.append([strings[i] for i in _unpack_array(take(4 * n), "I")])
+                except IndexError:
+                    raise ValueError("Corrupt string index in binary task file") from None
+            elif kind == 3:
+                columns.append(read_joined(n))
+            elif kind == 4:
+                columns.append([json.loads(v) for v in read_joined(n)])
+            else:
+                raise ValueError(f"Unknown column kind {kind} in binary task file")
+        if not keys:
+            yield [{} for _ in range(n)]
+        else:
+            yield [dict(zip(keys, row)) for row in zip(*columns)]
+
+def _iter_binary_file(f):
+    """Yield task segments from an open binary task file via a read-only memory map."""
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        yield from _iter_binary_segments(buf, len(BINARY_MAGIC))
+
+def iter_tasks(file_path=None, engine=None, chunk_size=ITER_CHUNK_SIZE):
+    """
+    Yield stored tasks one at a time without loading the whole file.
+    
+    The json engine parses the top-level array (or binary records)
+    incrementally, so only one task and one chunk of text are held at a time. The sqlite engine
+    streams rows from a cursor; the journal engine has to replay its log,
+    so it still loads everything first.
+    
+    Args:
+        file_path (str): Path to the JSON file (or database) containing tasks
+        engine (str): Storage engine (default DEFAULT_STORAGE_ENGINE)
+        chunk_size (int): Characters read from the file per step
+        
+    Yields:
+        dict: One task at a time, in file order
+    """
+    engine = _resolve_engine(engine)
+    file_path = _default_path(file_path, engine)
+    if engine == "sqlite":
+        yield from TaskDatabase(file_path)
+        return
+    if engine == "journal":
+        yield from load_tasks(file_path, engine)
+        return
+    try:
+        f = open(file_path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        if f.read(len(BINARY_MAGIC)) == BINARY_MAGIC:
+            for segment in _iter_binary_file(f):
+                yield from segment
+            return
+        f.seek(0)
+        yield from _iter_json_array(io.TextIOWrapper(f, encoding="utf-8"), chunk_size)
+
+def _iter_json_array(f, chunk_size):
+    """Yield the items of a JSON array read incrementally from f."""
+    decoder = json.JSONDecoder()
+    buf, pos = "", 0
+    started = eof = False
+    while True:
+        pos = _JSON_SEPARATORS.match(buf, pos).end()
+        if pos == len(buf):
+            # Everything buffered is consumed; drop it and read on
+            buf, pos = f.read(chunk_size), 0
+            if not buf:
+                raise json.JSONDecodeError("Unterminated array", "", 0)
+            continue
+        if not started:
+            if buf[pos] != "[":
+                raise json.JSONDecodeError("Expecting '['", buf, pos)
+            started = True
+            pos += 1
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            end = None
+        # An item running into the end of the buffer may continue in the next chunk
+        if end is None or (end == len(buf) and not eof):
+            if eof:
+                raise json.JSONDecodeError("Invalid array item", buf, pos)
+            more = f.read(chunk_size)
+            eof = not more
+            buf, pos = buf[pos:] + more, 0
+            continue
+        yield item
+        pos = end
+
+def save_tasks(tasks, file_path=None, engine=None, format=None):
+    """
+    Save tasks to a JSON file.
+    
+    The file is replaced atomically while holding the store's lock file. A
+    TaskList that was loaded from the store is only written if nobody else
+    wrote the store since; otherwise TaskConflictError is raised rather
+    than overwriting their change.
+    
+    With the journal engine this writes a fresh snapshot and discards the
+    operation log, so it doubles as a compaction.
+    
+    Args:
+        tasks (list): List of task dictionaries
+        file_path (str): Path to save the JSON file (or database)
+        engine (str): Storage engine, "json", "journal" or "sqlite" (default DEFAULT_STORAGE_ENGINE)
+        format (str): File format, "pretty", "compact" or "binary" (default DEFAULT_FILE_FORMAT);
+            ignored by the sqlite engine
+    """
+    engine = _resolve_engine(engine)
+    file_path = _default_path(file_path, engine)
+    if format is None:
+        format = DEFAULT_FILE_FORMAT
+    if format not in FILE_FORMATS:
+        raise ValueError(f"Unknown file format: {format}")
+    with _locked(file_path):
+        if is_stale(tasks, file_path, engine):
+            raise TaskConflictError(f"{file_path} changed since these tasks were loaded")
+        if engine == "sqlite":
+            TaskDatabase(file_path).replace_all(tasks)
+        else:
+            if format == "binary":
+                with _atomic_open(file_path, "wb") as f:
+                    f.write(_encode_binary(tasks))
+            elif format == "compact":
+                # json.dumps uses the C encoder in one call; json.dump streams
+                # through the pure-Python one
+                with _atomic_open(file_path) as f:
+                    f.write(json.dumps(tasks, separators=(",", ":"), default=_json_default))
+            else:
+                with _atomic_open(file_path) as f:
+                    json.dump(tasks, f, indent=2, default=_json_default)
+            _bump_meta_next_id(file_path, _next_id_of(tasks))
+            if engine == "journal":
+                try:
+                    os.remove(_journal_path(file_path))
+                except FileNotFoundError:
+                    pass
+        if isinstance(tasks, TaskList):
+            tasks.signature = store_signature(file_path, engine)
+
+def _meta_path(file_path):
+    """Return the metadata sidecar path that belongs to a task file."""
+    return file_path + META_SUFFIX
+
+def _read_meta(file_path):
+    """Read the metadata sidecar of a task file, {} if missing or unreadable."""
+    try:
+        with open(_meta_path(file_path), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _write_meta(file_path, meta):
+    """Write the metadata sidecar of a task file."""
+    with _atomic_open(_meta_path(file_path)) as f:
+        json.dump(meta, f)
+
+def _bump_meta_next_id(file_path, next_id):
+    """Raise the persisted id counter to next_id; it never moves backwards."""
+    with _locked(file_path):
+        meta = _read_meta(file_path)
+        if next_id > meta.get("next_id", 1):
+            meta["next_id"] = next_id
+            _write_meta(file_path, meta)
+
+def _next_id_of(tasks):
+    """Return the first id above every task in tasks."""
+    if isinstance(tasks, TaskList):
+        return tasks.next_id
+    return _max_int_id(t.get("id") for t in tasks) + 1
+
+def _max_int_id(ids):
+    """Return the largest integer among ids, or 0; ids of other types are not numbered."""
+    return max((i for i in ids if isinstance(i, int)), default=0)
+
+def _journal_path(file_path):
+    """Return the operation log path that belongs to a snapshot file."""
+    return file_path + JOURNAL_SUFFIX
+
+def _replay_journal(tasks, file_path):
+    """
+    Apply the operation log for file_path on top of a snapshot.
+    
+    Args:
+        tasks (list): Snapshot task dictionaries
+        file_path (str): Path of the snapshot file
+        
+    Returns:
+        TaskList: Tasks with every logged operation applied; its next_id also
+        covers ids that were logged and later deleted
+    """
+    by_id = {task["id"]: task for task in tasks}
+    max_id = 0
+    try:
+        f = open(_journal_path(file_path), "r")
+    except FileNotFoundError:
+        return TaskList(tasks)
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash mid-append leaves a partial last line; skip it
+                continue
+            op = record.get("op")
+            if op == "add":
+                # Like TaskList.put: a logged task replaces one with its id in place
+                task = record["task"]
+                by_id[task["id"]] = task
+                max_id = max(max_id, _max_int_id([task["id"]]))
+            elif op == "update" and record["id"] in by_id:
+                by_id[record["id"]].update(record["fields"])
+            elif op == "delete":
+                by_id.pop(record["id"], None)
+                max_id = max(max_id, _max_int_id([record["id"]]))
+    replayed = TaskList(by_id.values())
+    replayed.next_id = max(replayed.next_id, max_id + 1)
+    return replayed
+
+def append_task_change(op, task, file_path=None, engine=None, tasks=None):
+    """
+    Record a single add/update/delete without rewriting the whole store.
+    
+    Only engines that support incremental writes persist anything here;
+    callers fall back to save_tasks when this returns False. A change to a
+    TaskList with a background writer (see TaskStore) is left to its next
+    flush instead.
+    
+    Args:
+        op (str): "add", "update" or "delete"
+        task (dict): The task added, the changed fields plus "id", or just {"id": ...}
+        file_path (str): Path of the snapshot file (or database)
+        engine (str): Storage engine (default DEFAULT_STORAGE_ENGINE)
+        tasks (TaskList): In-memory list the change was already applied to;
+            if it was in sync with the store it stays marked in sync
+        
+    Returns:
+        bool: True if the change was persisted, False if a full save is needed
+    """
+    engine = _resolve_engine(engine)
+    file_path = _default_path(file_path, engine)
+    if _deferred(tasks, file_path, (task["id"],)):
+        return True
+    in_sync = _in_sync(tasks, file_path, engine)
+    if engine == "sqlite":
+        db = TaskDatabase(file_path)
+        if op == "add":
+            db.insert(task)
+        elif op == "update":
+            db.update(task["id"], {k: v for k, v in task.items() if k != "id"})
+        elif op == "delete":
+            db.delete(task["id"])
+        else:
+            raise ValueError(f"Unknown task change: {op}")
+        if in_sync:
+            tasks.signature = store_signature(file_path, engine)
+        return True
+    if engine != "journal":
+        return False
+    if op == "add":
+        record = {"op": "add", "task": task}
+    elif op == "update":
+        fields = {k: v for k, v in task.items() if k != "id"}
+        record = {"op": "update", "id": task["id"], "fields": fields}
+    elif op == "delete":
+        record = {"op": "delete", "id": task["id"]}
+    else:
+        raise ValueError(f"Unknown task change: {op}")
+    if op == "add":
+        _bump_meta_next_id(file_path, _max_int_id([task["id"]]) + 1)
+    _append_journal(file_path, [record])
+    if in_sync:
+        tasks.signature = store_signature(file_path, engine)
+    return True
+
+def _append_journal(file_path, records):
+    """Append journal records with a single write, then compact if due."""
+    with _locked(file_path):
+        with open(_journal_path(file_path), "a") as f:
+            f.write("".join(json.dumps(r, separators=(",", ":"), default=_json_default) + "\n" for r in records))
+            f.flush()
+            os.fsync(f.fileno())
+        _maybe_compact_journal(file_path)
+
+def _maybe_compact_journal(file_path):
+    """Compact the journal once it outgrows its snapshot."""
+    # Compacting only past the snapshot size keeps replay cheap and
+    # amortizes the O(N) rewrite over at least N bytes of appends
+    try:
+        snapshot_size = os.path.getsize(file_path)
+    except OSError:
+        snapshot_size = 0
+    if os.path.getsize(_journal_path(file_path)) > max(JOURNAL_COMPACT_BYTES, snapshot_size):
+        compact_journal(file_path)
+
+def compact_journal(file_path=None):
+    """
+    Fold the operation log into a new snapshot and remove the log.
+    
+    Args:
+        file_path (str): Path of the snapshot file
+        
+    Returns:
+        list: The compacted list of task dictionaries
+    """
+    if file_path is None:
+        file_path = DEFAULT_TASKS_FILE
+    with _locked(file_path):
+        tasks = load_tasks(file_path, engine="journal")
+        save_tasks(tasks, file_path, engine="journal")
+    return tasks
+
+def _in_priority_order(counts):
+    """Return priority -> count ordered like TASK_PRIORITIES, unknown priorities last."""
+    return dict(sorted(counts.items(), key=lambda item: PRIORITY_RANK.get(item[0], len(PRIORITY_RANK))))
+
+def _due_key(task):
+    """Return the due date a task is indexed and ordered by; "" when it has none."""
+    return str(task.get("due_date") or "")
+
+def _descending_due(entries, lo, hi):
+    """Yield the sorted (due_date, id) entries[lo:hi] latest date first, each date's ids in order."""
+    while hi > lo:
+        start = bisect_left(entries, (entries[hi - 1][0],), lo, hi)
+        yield from islice(entries, start, hi)
+        hi = start
+
+def _next_due_key(task):
+    """Sort key of next_due: due date, then priority rank, then id."""
+    return (
+        _due_key(task),
+        PRIORITY_RANK.get(task.get("priority"), len(PRIORITY_RANK)),
+        task.get("id", 0),
+    )
+
+def _last_due_key(task):
+    """Key whose largest values come first in next_due(ascending=False) order."""
+    due, rank, task_id = _next_due_key(task)
+    return (due, -rank, -task_id)
+
+def _top_due(tasks, k, ascending):
+    """Return the first k tasks in next_due order with a bounded heap."""
+    if ascending:
+        return heapq.nsmallest(k, tasks, key=_next_due_key)
+    return heapq.nlargest(k, tasks, key=_last_due_key)
+
+def _decrement(counter, key):
+    """Count key down by one, dropping it from counter at zero."""
+    if counter[key] <= 1:
+        counter.pop(key, None)
+    else:
+        counter[key] -= 1
+
+def _token_weights(task):
+    weights = {}
+    for text, weight in ((task.get("title"), SEARCH_TITLE_WEIGHT), (task.get("description"), 1)):
+        for token in _TOKEN_RE.findall(str(text or "").lower()):
+            weights[token] = weights.get(token, 0) + weight
+    return weights
+
+def _trigrams(word):
+    """Return the set of three-character substrings of word."""
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+class TaskList(list):
+    """
+    A list of task dictionaries that also keeps an id -> task index.
+    
+    It behaves like a plain list for existing callers (iteration, indexing,
+    json.dump, equality), while get and update_by_id find a task by id in
+    constant time. remove_by_id is O(N): the list and the sorted due-date
+    indexes close the gap the task leaves. The index follows every list
+    mutation, so tasks should be changed through these methods rather than
+    by rewriting a task's fields in place.
+    
+    next_id is the first id above every task ever held; it only grows, so
+    ids are not reused after a delete. version is bumped by every mutation
+    and keys the derived views memoized by cached().
+    
+    Each field in INDEXED_FIELDS also maps its values to the set of task
+    ids holding them, which query() intersects instead of scanning. The
+    inverted token index used by search() is built on the first search and
+    kept up to date from then on, through full reindexes too. A list of (due_date, id) pairs is kept
+    sorted with bisect, so due-date ranges and orderings are slices of it.
+    Counters of tasks created and completed per creation day, and a sorted
+    list of the due dates of open tasks, keep counts() and
+    completion_history() from visiting any task.
+    
+    Tasks without an id, or sharing one with an earlier task, are left out
+    of the indexes; while the list holds any, query(), search(), counts()
+    and completion_history() scan the list like a plain one instead.
+    
+    signature is the store_signature() of the file the list was last loaded
+    from or written to, or None for a list built in memory. writer is the
+    TaskStore that persists changes to the list in the background, if any.
+    """
+
+    def __init__(self, tasks=()):
+        super().__init__(tasks)
+        self.next_id = 1
+        self.version = 0
+        self.signature = None
+        self.writer = None
+        self._cache = {}
+        self._cache_version = 0
+        self._reindex()
+
+    def __reduce__(self):
+        return (type(self), (list(self),), {"next_id": self.next_id})
+
+    def _reindex(self):
+        self.version += 1
+        self._by_id = {t["id"]: t for t in self if "id" in t}
+        self.next_id = max(self.next_id, _max_int_id(self._by_id) + 1)
+        self._by_field = {field: {} for field in INDEXED_FIELDS}
+        # Once search() has built the postings they are rebuilt here, not dropped
+        searched = getattr(self, "_postings", None) is not None
+        self._postings = None
+        for task in self._by_id.values():
+            self._index_fields(task, sort=False)
+        if searched:
+            self._build_postings()
+        self._by_due = sorted((_due_key(t), k) for k, t in self._by_id.items())
+        tasks = self._by_id.values()
+        self._created = Counter(str(t.get("created_at", ""))[:10] for t in tasks)
+        self._created_completed = Counter(
+            str(t.get("created_at", ""))[:10] for t in tasks if t.get("completed", False)
+        )
+        self._open_due = sorted(_due_key(t) for t in tasks if not t.get("completed", False))
+
+    def _index(self, task):
+        self.version += 1
+        if "id" in task:
+            if task["id"] in self._by_id:
+                self._unindex_fields(self._by_id[task["id"]])
+            self._by_id[task["id"]] = task
+            self._index_fields(task)
+            self.next_id = max(self.next_id, _max_int_id([task["id"]]) + 1)
+
+    def _unindex(self, task):
+        self.version += 1
+        if self._by_id.get(task.get("id")) is task:
+            del self._by_id[task["id"]]
+            self._unindex_fields(task)
+
+    @staticmethod
+    def _field_key(task, field):
+        """Return the index key of a field; unhashable values are keyed by their repr."""
+        value = task.get(field)
+        if field == "completed":
+            return bool(value)
+        try:
+            hash(value)
+        except TypeError:
+            return repr(value)
+        return value
+
+    def _index_fields(self, task, sort=True):
+        for field, index in self._by_field.items():
+            index.setdefault(self._field_key(task, field), set()).add(task["id"])
+        if sort:
+            # _reindex builds these in bulk instead
+            insort(self._by_due, (_due_key(task), task["id"]))
+            day = str(task.get("created_at", ""))[:10]
+            self._created[day] += 1
+            if task.get("completed", False):
+                self._created_completed[day] += 1
+            else:
+                insort(self._open_due, _due_key(task))
+        if self._postings is not None:
+            for token, weight in _token_weights(task).items():
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    self._add_word(token)
+                postings[task["id"]] = weight
+
+    def _unindex_fields(self, task):
+        for field, index in self._by_field.items():
+            key = self._field_key(task, field)
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(task["id"])
+                if not ids:
+                    del index[key]
+        entry = (_due_key(task), task["id"])
+        i = bisect_left(self._by_due, entry)
+        if i < len(self._by_due) and self._by_due[i] == entry:
+            del self._by_due[i]
+        day = str(task.get("created_at", ""))[:10]
+        _decrement(self._created, day)
+        if task.get("completed", False):
+            _decrement(self._created_completed, day)
+        else:
+            due = _due_key(task)
+            i = bisect_left(self._open_due, due)
+            if i < len(self._open_due) and self._open_due[i] == due:
+                del self._open_due[i]
+        if self._postings is not None:
+            for token in _token_weights(task):
+                postings = self._postings.get(token)
+                if postings is not None:
+                    postings.pop(task["id"], None)
+                    if not postings:
+                        del self._postings[token]
+                        self._drop_word(token)
+
+    def _build_postings(self):
+        self._postings = {}
+        for task_id, task in self._by_id.items():
+            for token, weight in _token_weights(task).items():
+                self._postings.setdefault(token, {})[task_id] = weight
+        self._vocabulary = sorted(self._postings)
+        self._trigrams = {}
+        for token in self._vocabulary:
+            for gram in _trigrams(token):
+                self._trigrams.setdefault(gram, set()).add(token)
+
+    def _add_word(self, token):
+        insort(self._vocabulary, token)
+        for gram in _trigrams(token):
+            self._trigrams.setdefault(gram, set()).add(token)
+
+    def _drop_word(self, token):
+        del self._vocabulary[bisect_left(self._vocabulary, token)]
+        for gram in _trigrams(token):
+            tokens = self._trigrams[gram]
+            tokens.discard(token)
+            if not tokens:
+                del self._trigrams[gram]
+
+    def _words_containing(self, term):
+        """
+        Return the postings of the vocabulary words containing term.
+        
+        Gives (postings, score boost) pairs for the words term prefixes, a
+        bisect range of the sorted vocabulary, and the postings of the other
+        words, found through the trigrams of term; those are None for a term
+        shorter than a trigram, as only a vocabulary scan finds them.
+        """
+        prefixed = []
+        i = bisect_left(self._vocabulary, term)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(term):
+            token = self._vocabulary[i]
+            prefixed.append((self._postings[token], 2 if token == term else 1))
+            i += 1
+        grams = sorted((self._trigrams.get(gram, set()) for gram in _trigrams(term)), key=len)
+        if not grams:
+            return prefixed, None
+        inside = [
+            self._postings[token] for token in grams[0].intersection(*grams[1:])
+            if term in token and not token.startswith(term)
+        ]
+        return prefixed, inside
+
+    def _indexed(self):
+        """Return True if the id index, and so every other index, covers the whole list."""
+        return len(self._by_id) == len(self)
+
+    def cached(self, key, compute):
+        """
+        Return compute() memoized under key until the next mutation.
+        
+        Cached values are shared between callers and must not be modified.
+        """
+        if self._cache_version != self.version or len(self._cache) >= VIEW_CACHE_SIZE:
+            self._cache.clear()
+            self._cache_version = self.version
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = self._cache[key] = compute()
+            return value
+
+    def get(self, task_id, default=None):
+        """Return the task with the given id, or default."""
+        return self._by_id.get(task_id, default)
+
+    def query(self, category=None, priority=None, completed=None,
+              due_before=None, due_from=None, order_by_due=False, ascending=True, limit=None):
+        """
+        Select tasks matching every given condition through the indexes.
+        
+        The id sets are intersected smallest first, and a due-date range is a
+        bisect slice of the due-date index, so the cost follows the size of
+        the result rather than the length of the list. Takes the same
+        arguments as TaskDatabase.query.
+        
+        Args:
+            category (str): Category to match, None for any
+            priority (str): Priority to match, None for any
+            completed (bool): Completion status to match, None for any
+            due_before (str): Only tasks with due_date < this YYYY-MM-DD value
+            due_from (str): Only tasks with due_date >= this YYYY-MM-DD value
+            order_by_due (bool): Order by due_date instead of id
+            ascending (bool): Direction of the due_date ordering; tasks due
+                the same day stay in id order either way
+            limit (int): Return at most this many tasks, None for all
+            
+        Returns:
+            list: Matching task dictionaries
+        """
+        if not self._indexed():
+            return TaskColumns(self).query(
+                category, priority, completed, due_before, due_from, order_by_due, ascending, limit
+            )
+        conditions = {"category": category, "priority": priority, "completed": completed}
+        sets = [
+            self._by_field[field].get(self._field_key(conditions, field), set())
+            for field, value in conditions.items() if value is not None
+        ]
+        sets.sort(key=len)
+        if due_before is None and due_from is None and not order_by_due:
+            ids = sets[0].intersection(*sets[1:]) if sets else self._by_id.keys()
+            ids = sorted(ids) if limit is None else heapq.nsmallest(limit, ids)
+            return [self._by_id[task_id] for task_id in ids]
+        lo = 0 if due_from is None else bisect_left(self._by_due, (due_from,))
+        hi = len(self._by_due) if due_before is None else bisect_left(self._by_due, (due_before,))
+        if not sets and order_by_due and limit is not None:
+            # Only the first or last limit entries of the range are read,
+            # plus the ties of the last day reached going backwards
+            if ascending:
+                hi = min(hi, lo + limit)
+            elif hi - limit > lo:
+                lo = bisect_left(self._by_due, (self._by_due[hi - limit][0],), lo, hi)
+        if sets and order_by_due and limit is not None and limit * len(self._by_id) < len(sets[0]) ** 2:
+            # Matches are dense enough that walking the due-date index from the
+            # wanted end reaches limit of them sooner than sorting the id set
+            by_due = self._by_due
+            entries = islice(by_due, lo, hi) if ascending else _descending_due(by_due, lo, hi)
+            entries = (e for e in entries if all(e[1] in ids for ids in sets))
+            return [self._by_id[task_id] for _, task_id in islice(entries, limit)]
+        if sets and len(sets[0]) < hi - lo:
+            # The field sets are narrower than the date range: filter them by date
+            entries = sorted(
+                (_due_key(self._by_id[task_id]), task_id)
+                for task_id in sets[0].intersection(*sets[1:])
+            )
+            entries = entries[bisect_left(entries, (due_from,)) if due_from is not None else 0:
+                              bisect_left(entries, (due_before,)) if due_before is not None else None]
+        else:
+            entries = self._by_due[lo:hi]
+            if sets:
+                entries = [e for e in entries if all(e[1] in ids for ids in sets)]
+        if not order_by_due:
+            ids = (task_id for _, task_id in entries)
+            ids = sorted(ids) if limit is None else heapq.nsmallest(limit, ids)
+            return [self._by_id[task_id] for task_id in ids]
+        if not ascending:
+            entries = _descending_due(entries, 0, len(entries))
+        return [self._by_id[task_id] for _, task_id in islice(entries, limit)]
+
+    def search(self, query):
+        """
+        Find tasks whose title or description contains the query, ignoring
+        case, best matches first.
+        
+        The matches are those of search_tasks on a plain list. Every word of
+        the query lies inside a word of a matching task, so the candidates
+        are the tasks holding, for each query word, a vocabulary word that
+        contains it; only those are checked against the whole query. A
+        candidate scores the weight of every word that a query word
+        prefixes, with title words counting SEARCH_TITLE_WEIGHT times and
+        whole-word matches double, so a match inside a word ranks last.
+        
+        The vocabulary words are found by bisect and by a trigram index of
+        the vocabulary rather than by reading all of it. A query word
+        shorter than three characters, or one whose words have at least a
+        posting per task, matches too much for the postings to narrow it
+        down, so the list is scanned for the matches instead and only the
+        postings of the words the query words prefix are read to score them.
+        
+        Args:
+            query (str): Search text
+            
+        Returns:
+            list: Matching tasks ranked by score, then id; in list order
+            when the query has no words or the list has unindexed tasks
+        """
+        matcher = _text_matcher(query)
+        terms = set(_TOKEN_RE.findall(query.lower()))
+        if not terms or not self._indexed():
+            return list(filter(matcher, self))
+        if self._postings is None:
+            self._build_postings()
+        matched, scan = [], False
+        for term in terms:
+            prefixed, inside = self._words_containing(term)
+            if inside is None:
+                scan = True
+                inside = ()
+            elif not prefixed and not inside:
+                return []
+            # Words with the term inside them match too, but add nothing to the score
+            postings = prefixed + [(p, 0) for p in inside]
+            matched.append((sum(len(p) for p, _ in postings), postings, prefixed))
+        matched.sort(key=lambda m: m[0])
+        if scan or matched[0][0] >= len(self._by_id):
+            # Too broad for the postings to narrow anything down: scan for the
+            # matches and score them off the words the query words prefix
+            scores = {task["id"]: 0 for task in filter(matcher, self)}
+            for _, _, prefixed in matched:
+                for p, boost in prefixed:
+                    for task_id, weight in p.items():
+                        if task_id in scores:
+                            scores[task_id] += weight * boost
+            return [self._by_id[k] for k in sorted(scores, key=lambda k: (-scores[k], k))]
+        # Score the most selective word first, then only look up its survivors
+        scores = None
+        for size, postings, _ in matched:
+            if scores is None or len(scores) * len(postings) > size:
+                term_scores = {}
+                for p, boost in postings:
+                    for task_id, weight in p.items():
+                        term_scores[task_id] = term_scores.get(task_id, 0) + weight * boost
+                if scores is not None:
+                    term_scores = {k: v + scores[k] for k, v in term_scores.items() if k in scores}
+            else:
+                term_scores = {}
+                for task_id, score in scores.items():
+                    hits = [p[task_id] * boost for p, boost in postings if task_id in p]
+                    if hits:
+                        term_scores[task_id] = score + sum(hits)
+            scores = term_scores
+            if not scores:
+                return []
+        ranked = (self._by_id[k] for k in sorted(scores, key=lambda k: (-scores[k], k)))
+        return list(filter(matcher, ranked))
+
+    def count(self, category=None, priority=None, completed=None):
+        """
+        Return the number of tasks matching every given condition.
+        
+        A single condition is the size of its id set and several are counted
+        by probing the smallest set against the others, so no task is visited
+        and no list is built.
+        """
+        if not self._indexed():
+            return len(self.query(category, priority, completed))
+        conditions = {"category": category, "priority": priority, "completed": completed}
+        sets = sorted(
+            (self._by_field[field].get(self._field_key(conditions, field), set())
+             for field, value in conditions.items() if value is not None),
+            key=len,
+        )
+        if not sets:
+            return len(self._by_id)
+        return sum(1 for task_id in sets[0] if all(task_id in ids for ids in sets[1:]))
+
+    def counts(self, today=None):
+        """
+        Read the counts of TaskColumns.counts off the running counters.
+        
+        The per-field id sets give the category, priority and completed
+        counts, and a sorted list of the due dates of open tasks gives the
+        overdue count with one bisect, so no task is visited.
+        
+        Args:
+            today: Date, YYYY-MM-DD string or clock to compare against (see _today)
+            
+        Returns:
+            TaskCounts: Like TaskColumns.counts
+        """
+        if not self._indexed():
+            return TaskColumns(self).counts(today)
+        today = _today(today)
+        by_field = self._by_field
+        return TaskCounts(
+            total=len(self._by_id),
+            completed=len(by_field["completed"].get(True, ())),
+            overdue=bisect_left(self._open_due, today),
+            by_category={k: len(ids) for k, ids in by_field["category"].items() if type(k) is str},
+            by_priority=_in_priority_order(
+                {k: len(ids) for k, ids in by_field["priority"].items() if type(k) is str}
+            ),
+        )
+
+    def completion_history(self):
+        """Return (creation day, tasks created, of those completed) tuples, oldest day first."""
+        if not self._indexed():
+            return get_completion_history(iter(self))
+        return [(day, n, self._created_completed[day]) for day, n in sorted(self._created.items())]
+
+    def next_due(self, k, ascending=True, **conditions):
+        """
+        Return the first k tasks in next_due() order off the due-date index.
+        
+        conditions are those of query(). The first k matches in due-date
+        order are read through query(), plus every match due on the day
+        they end on so that its ties can be ordered by priority, so the
+        cost follows k rather than the length of the list.
+        """
+        if k <= 0:
+            return []
+        if not self._indexed():
+            return _top_due(self.query(**conditions), k, ascending)
+        first = self.query(order_by_due=True, ascending=ascending, limit=k, **conditions)
+        if not first:
+            return []
+        boundary = _due_key(first[-1])
+        # boundary + "\0" is the first string after boundary, so this is the boundary day alone
+        ties = self.query(**dict(conditions, due_from=boundary, due_before=boundary + "\0"))
+        return _top_due(chain((t for t in first if _due_key(t) != boundary), ties), k, ascending)
+
+    def update_by_id(self, task_id, fields):
+        """
+        Merge fields into a task in place; return it, or None if missing.
+        
+        If the changed task cannot be indexed, its old fields are restored,
+        the indexes rebuilt and the error raised.
+        """
+        task = self._by_id.get(task_id)
+        if task is not None:
+            old = dict(task)
+            self._unindex(task)
+            task.update({k: v for k, v in fields.items() if k != "id"})
+            try:
+                self._index(task)
+            except Exception:
+                task.clear()
+                task.update(old)
+                self._reindex()
+                raise
+        return task
+
+    def put(self, task):
+        """Replace the task with the same id in place, or append it."""
+        existing = self._by_id.get(task["id"])
+        if existing is None:
+            self.append(task)
+            return task
+        self._unindex(existing)
+        if existing is not task:
+            existing.clear()
+            existing.update(task)
+        self._index(existing)
+        return existing
+
+    def remove_by_id(self, task_id):
+        """
+        Remove and return the task with the given id, or None if missing.
+        
+        Finding the task is a dict lookup, but removing it is O(N): the task
+        is found in the list by a scan and deleted from the sorted due-date
+        lists, and each deletion shifts the entries after it. The list keeps
+        its order, which is the order it is saved in, so it does not swap
+        the last task into the gap or leave a tombstone. To drop many tasks,
+        use remove_where, which rebuilds the list once.
+        """
+        task = self._by_id.get(task_id)
+        if task is not None:
+            self._unindex(task)
+            # Tasks are unique by id, so the scan stops at the first
+            # differing "id" of every earlier dict and matches ours by identity
+            list.remove(self, task)
+        return task
+
+    def remove_where(self, predicate):
+        """
+        Remove and return every task for which predicate(task) is true.
+        
+        The kept tasks are put back with one pass over the list, and only
+        the removed ones are taken out of the indexes, so the indexes and
+        postings of the kept tasks are left as they are.
+        """
+        kept, removed = [], []
+        for task in self:
+            (removed if predicate(task) else kept).append(task)
+        if removed:
+            super().__setitem__(slice(None), kept)
+            for task in removed:
+                self._unindex(task)
+        return removed
+
+    def append(self, task):
+        super().append(task)
+        self._index(task)
+
+    def insert(self, index, task):
+        super().insert(index, task)
+        self._index(task)
+
+    def extend(self, tasks):
+        tasks = list(tasks)
+        super().extend(tasks)
+        for task in tasks:
+            self._index(task)
+
+    def __iadd__(self, tasks):
+        self.extend(tasks)
+        return self
+
+    def __imul__(self, n):
+        super().__imul__(n)
+        self._reindex()
+        return self
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            super().__setitem__(index, value)
+            self._reindex()
+        else:
+            old = self[index]
+            super().__setitem__(index, value)
+            self._unindex(old)
+            self._index(value)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            super().__delitem__(index)
+            self._reindex()
+        else:
+            task = self[index]
+            super().__delitem__(index)
+            self._unindex(task)
+
+    def pop(self, index=-1):
+        task = super().pop(index)
+        self._unindex(task)
+        return task
+
+    def remove(self, task):
+        super().remove(task)
+        self._unindex(task)
+
+    def clear(self):
+        super().clear()
+        self._reindex()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self.version += 1
+
+    def reverse(self):
+        super().reverse()
+        self.version += 1
+
+class _Missing:
+    """Type of _MISSING; it pickles by name, so copies stay the same sentinel."""
+
+    __slots__ = ()
+
+    def __reduce__(self):
+        return "_MISSING"
+
+    def __repr__(self):
+        return "<missing>"
+
+# Sentinel for a Task field, or TaskTable cell, that the task does not have
+_MISSING = _Missing()
+
+# "YYYY-MM-DD" <-> day ordinal, so every task due the same day shares one int and one str
+_DATE_ORDINALS = {}
+_ORDINAL_DATES = {}
+
+def _date_ordinal(value):
+    """Return the day ordinal of a "YYYY-MM-DD" string, or None for anything else."""
+    if type(value) is not str:
+        return None
+    ordinal = _DATE_ORDINALS.get(value)
+    if ordinal is None:
+        try:
+            day = date.fromisoformat(value)
+        except ValueError:
+            return None
+        # fromisoformat also takes other ISO spellings that would not round-trip
+        if day.isoformat() != value:
+            return None
+        ordinal = _DATE_ORDINALS.setdefault(value, day.toordinal())
+        _ORDINAL_DATES.setdefault(ordinal, value)
+    return ordinal
+
+def _ordinal_date(ordinal):
+    """Return the "YYYY-MM-DD" string of a day ordinal, shared like _date_ordinal's."""
+    text = _ORDINAL_DATES.get(ordinal)
+    if text is None:
+        text = _ORDINAL_DATES.setdefault(ordinal, date.fromordinal(ordinal).isoformat())
+        _DATE_ORDINALS.setdefault(text, ordinal)
+    return text
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+def _json_default(obj):
+    """json.dump hook writing Task and TaskTable like the dicts they stand for."""
+    if isinstance(obj, Task):
+        return obj.to_dict()
+    if isinstance(obj, TaskTable):
+        return [task.to_dict() for task in obj]
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class Task(MutableMapping):
+    """
+    A compact task record that reads and writes like a task dictionary.
+    
+    The TASK_FIELDS live in __slots__ instead of a per-task hash table.
+    priority and category are interned, so every task shares one string per
+    value, and due_date is kept as a day ordinal shared by every task due
+    that day; task["due_date"] still returns the "YYYY-MM-DD" string. Any
+    other field, or a due_date that is not a valid date, is kept in a small
+    dict of extras. Tasks compare equal to dicts with the same items, and
+    save_tasks writes them like dicts, so lists of Task work with the
+    functions of this module.
+    """
+
+    __slots__ = ("id", "title", "description", "priority", "category", "_due", "completed",
+                 "created_at", "_extra")
+
+    def __init__(self, *args, **kwargs):
+        for name in Task.__slots__:
+            setattr(self, name, _MISSING)
+        self._extra = None
+        self.update(*args, **kwargs)
+
+    @classmethod
+    def from_dict(cls, task):
+        """Return a Task with the items of a task dictionary."""
+        record = cls()
+        for key, value in task.items():
+            record[key] = value
+        return record
+
+    def __getitem__(self, key):
+        if key == "due_date" and self._due is not _MISSING:
+            return _ordinal_date(self._due)
+        if key in _TASK_SLOTS:
+            value = getattr(self, key)
+            if value is not _MISSING:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        if key == "due_date":
+            ordinal = _date_ordinal(value)
+            if ordinal is not None:
+                self._due = ordinal
+                self._pop_extra(key)
+                return
+            self._due = _MISSING
+        elif key in _TASK_SLOTS:
+            setattr(self, key, _intern(value) if key in ("priority", "category") else value)
+            return
+        if self._extra is None:
+            self._extra = {}
+        self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key == "due_date" and self._due is not _MISSING:
+            self._due = _MISSING
+        elif key in _TASK_SLOTS and getattr(self, key) is not _MISSING:
+            setattr(self, key, _MISSING)
+        elif not self._pop_extra(key):
+            raise KeyError(key)
+
+    def _pop_extra(self, key):
+        if self._extra is None or key not in self._extra:
+            return False
+        del self._extra[key]
+        if not self._extra:
+            self._extra = None
+        return True
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self):
+        for key in TASK_FIELDS:
+            if key == "due_date":
+                present = self._due is not _MISSING
+            else:
+                present = getattr(self, key) is not _MISSING
+            if present:
+                yield key
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __eq__(self, other):
+        if isinstance(other, (Task, dict)):
+            return self.to_dict() == dict(other)
+        return super().__eq__(other)
+
+    def copy(self):
+        """Return a shallow copy, like dict.copy()."""
+        task = Task.__new__(Task)
+        for name in Task.__slots__:
+            setattr(task, name, getattr(self, name))
+        if self._extra is not None:
+            task._extra = dict(self._extra)
+        return task
+
+    def to_dict(self):
+        """Return the task as a plain dictionary."""
+        return {key: self[key] for key in self}
+
+    def __repr__(self):
+        return f"Task({self.to_dict()!r})"
+
+# Task fields held in a slot of the same name (due_date is held as an ordinal in _due)
+_TASK_SLOTS = frozenset(TASK_FIELDS) - {"due_date"}
+
+class TaskTable(MutableSequence):
+    """
+    A column-per-field table of tasks for stores with millions of rows.
+    
+    ids are packed in an int64 array, priority and category in uint16 arrays
+    of codes into per-table lists of names (see names()), due dates in an int32 array of
+    day ordinals and completed in a bytearray; titles, descriptions and
+    created_at stay in lists. Any value a column cannot hold, and any field
+    outside TASK_FIELDS, goes to a per-row dict of extras. Every task needs
+    an integer id.
+    
+    Indexing or iterating yields Task records built from the columns, so the
+    functions of this module read a TaskTable like a list of tasks. A
+    yielded Task is a copy: assign it back (table[i] = task) to change the
+    row. Build one from a file without holding every dict at once with
+    TaskTable(iter_tasks(file_path)).
+    """
+
+    # Column codes meaning "not held in this column"
+    _NO_CODE = 0
+    _NO_FLAG = 2
+
+    def __init__(self, tasks=()):
+        self._ids = array("q")
+        self._titles = []
+        self._descriptions = []
+        self._created = []
+        self._codes = {"priority": array("H"), "category": array("H")}
+        # Priority codes follow TASK_PRIORITIES, so they also sort by urgency
+        self._names = {"priority": [None, *TASK_PRIORITIES], "category": [None]}
+        self._lookup = {"priority": {p: i for i, p in enumerate(TASK_PRIORITIES, 1)}, "category": {}}
+        self._due = array("i")
+        self._completed = bytearray()
+        self._extras = []
+        self.extend(tasks)
+
+    def names(self, field):
+        """Return the list of names the codes of "priority" or "category" index."""
+        return self._names[field]
+
+    def _encode(self, field, value, extras):
+        lookup = self._lookup[field]
+        code = lookup.get(value) if type(value) is str else None
+        if code is None:
+            names = self._names[field]
+            if type(value) is not str or len(names) > 0xFFFF:
+                if value is not _MISSING:
+                    extras[field] = value
+                return self._NO_CODE
+            code = lookup[value] = len(names)
+            names.append(sys.intern(value))
+        return code
+
+    def _encode_row(self, task):
+        task_id = task.get("id")
+        if type(task_id) is not int or not -(1 << 63) <= task_id < (1 << 63):
+            raise ValueError(f"TaskTable rows need an integer id, got {task_id!r}")
+        extras = {k: v for k, v in task.items() if k not in TASK_FIELDS}
+        priority = self._encode("priority", task.get("priority", _MISSING), extras)
+        category = self._encode("category", task.get("category", _MISSING), extras)
+        due = task.get("due_date", _MISSING)
+        ordinal = _date_ordinal(due)
+        if ordinal is None:
+            ordinal = 0
+            if due is not _MISSING:
+                extras["due_date"] = due
+        completed = task.get("completed", _MISSING)
+        if type(completed) is bool:
+            flag = int(completed)
+        else:
+            flag = self._NO_FLAG
+            if completed is not _MISSING:
+                extras["completed"] = completed
+        return (
+            task_id,
+            task.get("title", _MISSING),
+            task.get("description", _MISSING),
+            task.get("created_at", _MISSING),
+            priority,
+            category,
+            ordinal,
+            flag,
+            extras or None,
+        )
+
+    def _decode_row(self, i):
+        task = Task.__new__(Task)
+        task.id = self._ids[i]
+        task.title = self._titles[i]
+        task.description = self._descriptions[i]
+        task.created_at = self._created[i]
+        for field in ("priority", "category"):
+            code = self._codes[field][i]
+            setattr(task, field, self._names[field][code] if code != self._NO_CODE else _MISSING)
+        ordinal = self._due[i]
+        task._due = ordinal if ordinal else _MISSING
+        flag = self._completed[i]
+        task.completed = bool(flag) if flag != self._NO_FLAG else _MISSING
+        task._extra = None
+        extras = self._extras[i]
+        if extras is not None:
+            for key, value in extras.items():
+                task[key] = value
+        return task
+
+    def _position(self, index):
+        n = len(self)
+        if not -n <= index < n:
+            raise IndexError("TaskTable index out of range")
+        return index % n
+
+    def _store_row(self, i, row):
+        (self._ids[i], self._titles[i], self._descriptions[i], self._created[i],
+         self._codes["priority"][i], self._codes["category"][i], self._due[i],
+         self._completed[i], self._extras[i]) = row
+
+    def _columns(self):
+        return (self._ids, self._titles, self._descriptions, self._created,
+                self._codes["priority"], self._codes["category"], self._due,
+                self._completed, self._extras)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._decode_row(i) for i in range(*index.indices(len(self)))]
+        return self._decode_row(self._position(index))
+
+    def __setitem__(self, index, task):
+        if isinstance(index, slice):
+            raise TypeError("TaskTable does not support slice assignment")
+        self._store_row(self._position(index), self._encode_row(task))
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            for i in sorted(range(*index.indices(len(self))), reverse=True):
+                del self[i]
+            return
+        index = self._position(index)
+        for column in self._columns():
+            del column[index]
+
+    def insert(self, index, task):
+        row = self._encode_row(task)
+        index = min(max(index + len(self) if index < 0 else index, 0), len(self))
+        for column, value in zip(self._columns(), row):
+            column.insert(index, value)
+
+    def append(self, task):
+        for column, value in zip(self._columns(), self._encode_row(task)):
+            column.append(value)
+
+    def extend(self, tasks):
+        for task in tasks:
+            self.append(task)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._decode_row(i)
+
+    def __eq__(self, other):
+        if isinstance(other, (TaskTable, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"TaskTable({list(self)!r})"
+
+def find_task(tasks, task_id):
+    """
+    Look up a task by id.
+    
+    Args:
+        tasks: A TaskList or TaskDatabase (constant time), or any iterable of tasks
+        task_id (int): ID of the task to find
+        
+    Returns:
+        dict: The matching task, or None
+    """
+    if isinstance(tasks, (TaskList, TaskDatabase)):
+        return tasks.get(task_id)
+    return next((t for t in tasks if t.get("id") == task_id), None)
+
+class TaskDatabase:
+    """
+    Tasks stored as rows of a local SQLite database.
+    
+    Each row keeps the full task as JSON plus indexed priority, category,
+    completed and due_date columns, so filters and sorting run as indexed
+    queries instead of Python scans. Iterating yields task dictionaries
+    straight from the cursor without loading the whole table.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS tasks ("
+        " id INTEGER PRIMARY KEY,"
+        " priority TEXT,"
+        " category TEXT,"
+        " completed INTEGER NOT NULL DEFAULT 0,"
+        " due_date TEXT NOT NULL DEFAULT '',"
+        " data TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_category ON tasks (category)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks (completed)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks (due_date, id)",
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    )
+
+    # Database paths whose schema has already been created in this process
+    _initialized = set()
+
+    def __init__(self, file_path=None):
+        self.file_path = file_path if file_path is not None else DEFAULT_TASKS_DB
+        key = os.path.abspath(self.file_path)
+        if key not in self._initialized or not os.path.exists(self.file_path):
+            with closing(self._connect()) as conn, conn:
+                for statement in self._SCHEMA:
+                    conn.execute(statement)
+            self._initialized.add(key)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.file_path)
+        conn.create_function("contains_text", 2, _contains_text, deterministic=True)
+        return conn
+
+    @staticmethod
+    def _row(task):
+        """Return the column values stored for a task dictionary."""
+        return (
+            task["id"],
+            task.get("priority"),
+            task.get("category"),
+            int(bool(task.get("completed", False))),
+            _due_key(task),
+            json.dumps(task, default=_json_default),
+        )
+
+    def __iter__(self):
+        return self._select("SELECT data FROM tasks ORDER BY id", ())
+
+    def __len__(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def _select(self, sql, params):
+        with closing(self._connect()) as conn:
+            for (data,) in conn.execute(sql, params):
+                yield json.loads(data)
+
+    def get(self, task_id):
+        """Return the task with the given id, or None."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT data FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @staticmethod
+    def _next_id(conn):
+        return conn.execute(
+            "SELECT MAX(COALESCE((SELECT value FROM meta WHERE key = 'next_id'), 1),"
+            " COALESCE(MAX(id), 0) + 1) FROM tasks"
+        ).fetchone()[0]
+
+    @staticmethod
+    def _bump_next_id(conn, next_id):
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('next_id', ?)"
+            " ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)",
+            (next_id,),
+        )
+
+    def next_id(self):
+        """Return the next unused task id; deleted ids are never handed out again."""
+        with closing(self._connect()) as conn:
+            return self._next_id(conn)
+
+    def allocate_ids(self, n):
+        """Reserve n consecutive ids in one transaction and return them as a range."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            start = self._next_id(conn)
+            self._bump_next_id(conn, start + n)
+        return range(start, start + n)
+
+    def categories(self):
+        """Return the distinct task categories in sorted order."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT category FROM tasks WHERE category IS NOT NULL ORDER BY category"
+            ).fetchall()
+        return [category for (category,) in rows]
+
+    def counts(self, today=None):
+        """Return the TaskCounts of TaskColumns.counts, aggregated by SQLite."""
+        today = _today(today)
+        with closing(self._connect()) as conn:
+            total, completed, overdue = conn.execute(
+                "SELECT COUNT(*), TOTAL(completed), TOTAL(completed = 0 AND due_date < ?) FROM tasks",
+                (today,),
+            ).fetchone()
+            by_category, by_priority = (
+                dict(conn.execute(
+                    f"SELECT {field}, COUNT(*) FROM tasks WHERE typeof({field}) = 'text' GROUP BY {field}"
+                ).fetchall())
+                for field in ("category", "priority")
+            )
+        return TaskCounts(
+            total=total,
+            completed=int(completed),
+            overdue=int(overdue),
+            by_category=by_category,
+            by_priority=_in_priority_order(by_priority),
+        )
+
+    def completion_history(self):
+        """Return (creation day, tasks created, of those completed) tuples, oldest day first."""
+        with closing(self._connect()) as conn:
+            return [tuple(row) for row in conn.execute(
+                "SELECT substr(COALESCE(json_extract(data, '$.created_at'), ''), 1, 10) AS day,"
+                " COUNT(*), CAST(TOTAL(completed) AS INTEGER) FROM tasks GROUP BY day ORDER BY day"
+            )]
+
+    def query(self, category=None, priority=None, completed=None,
+              due_before=None, due_from=None, order_by_due=False, ascending=True, limit=None):
+        """
+        Select tasks matching every given condition.
+        
+        Args:
+            category (str): Category to match, None for any
+            priority (str): Priority to match, None for any
+            completed (bool): Completion status to match, None for any
+            due_before (str): Only tasks with due_date < this YYYY-MM-DD value
+            due_from (str): Only tasks with due_date >= this YYYY-MM-DD value
+            order_by_due (bool): Order by due_date instead of id
+            ascending (bool): Direction of the due_date ordering; tasks due
+                the same day stay in id order either way
+            limit (int): Return at most this many tasks, None for all
+            
+        Returns:
+            list: Matching task dictionaries
+        """
+        sql, params = self._where(category, priority, completed, due_before, due_from)
+        sql = "SELECT data FROM tasks" + sql
+        if order_by_due:
+            sql += " ORDER BY due_date " + ("ASC" if ascending else "DESC") + ", id"
+        else:
+            sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return list(self._select(sql, params))
+
+    @staticmethod
+    def _where(category=None, priority=None, completed=None, due_before=None, due_from=None, search=""):
+        """
+        Return the WHERE clause (or "") and its parameters for the conditions
+        of query(), and for search, matched like search_tasks on a list.
+        """
+        clauses, params = [], []
+        for column, value in (("category", category), ("priority", priority)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if completed is not None:
+            clauses.append("completed = ?")
+            params.append(int(bool(completed)))
+        if due_before is not None:
+            clauses.append("due_date < ?")
+            params.append(due_before)
+        if due_from is not None:
+            clauses.append("due_date >= ?")
+            params.append(due_from)
+        if search:
+            clauses.append(
+                "(contains_text(json_extract(data, '$.title'), ?)"
+                " OR contains_text(json_extract(data, '$.description'), ?))"
+            )
+            params += [search.lower()] * 2
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def count(self, **conditions):
+        """Return the number of tasks matching the conditions of _where with one COUNT(*) query."""
+        where, params = self._where(**conditions)
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM tasks" + where, params).fetchone()[0]
+
+    def view_page(self, today, offset, limit, ascending=True, **conditions):
+        """
+        Return limit tasks from offset on of the overdue, due today and
+        upcoming sections of partition_by_due laid end to end.
+        
+        Each section is in next_due() order, and the sections and the order
+        are one ORDER BY of a single LIMIT/OFFSET query, so only the rows
+        of the page are read and decoded.
+        
+        Args:
+            today (str): YYYY-MM-DD day the sections split on
+            offset (int): Number of tasks to skip
+            limit (int): Number of tasks to return
+            ascending (bool): Earliest due dates first in each section
+            **conditions: Conditions of _where
+            
+        Returns:
+            list: The tasks of the page, in section order
+        """
+        rank = " ".join(f"WHEN '{p}' THEN {i}" for p, i in PRIORITY_RANK.items())
+        where, params = self._where(**conditions)
+        sql = (
+            "SELECT data FROM tasks" + where
+            + " ORDER BY CASE WHEN due_date = ? THEN 1 WHEN due_date < ? AND completed = 0 THEN 0 ELSE 2 END,"
+            + " due_date " + ("ASC" if ascending else "DESC")
+            + f", CASE priority {rank} ELSE {len(PRIORITY_RANK)} END, id LIMIT ? OFFSET ?"
+        )
+        return list(self._select(sql, (*params, today, today, max(limit, 0), max(offset, 0))))
+
+    def next_due(self, k, ascending=True, **conditions):
+        """
+        Return the first k tasks in next_due() order with one ordered, limited query.
+        
+        conditions are those of query() and go into its WHERE clause.
+        """
+        rank = " ".join(f"WHEN '{p}' THEN {i}" for p, i in PRIORITY_RANK.items())
+        where, params = self._where(**conditions)
+        sql = (
+            "SELECT data FROM tasks" + where + " ORDER BY due_date " + ("ASC" if ascending else "DESC")
+            + f", CASE priority {rank} ELSE {len(PRIORITY_RANK)} END, id LIMIT ?"
+        )
+        return list(self._select(sql, (*params, max(k, 0))))
+
+    def insert(self, task):
+        """
+        Insert a new task.
+        
+        Raises:
+            TaskConflictError: If a task with the same id is already stored;
+                the stored task is left as it is
+        """
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute("INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?)", self._row(task))
+                self._bump_next_id(conn, task["id"] + 1)
+        except sqlite3.IntegrityError:
+            raise TaskConflictError(f"Task id {task['id']} is already taken in {self.file_path}") from None
+
+    def insert_chunks(self, chunks):
+        """
+        Insert chunks of new tasks (without ids) in a single transaction.
+        
+        Ids for each chunk are allocated as one block from the meta counter.
+        
+        Returns:
+            int: Number of tasks inserted
+        """
+        count = 0
+        with closing(self._connect()) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for chunk in chunks:
+                start = self._next_id(conn)
+                rows = [self._row(dict(id=start + i, **task)) for i, task in enumerate(chunk)]
+                conn.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self._bump_next_id(conn, start + len(rows))
+                count += len(rows)
+        return count
+
+    def update(self, task_id, fields):
+        """Merge fields into one stored task; return it, or None if missing."""
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT data FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            if row is None:
+                return None
+            task = json.loads(row[0])
+            task.update(fields)
+            conn.execute("INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?)", self._row(task))
+        return task
+
+    def update_many(self, changes):
+        """
+        Merge fields into many stored tasks in one transaction.
+        
+        Args:
+            changes (dict): Task id -> fields to merge
+            
+        Returns:
+            list: The updated tasks; ids with no row are skipped
+        """
+        updated = []
+        with closing(self._connect()) as conn, conn:
+            for task_id, fields in changes.items():
+                row = conn.execute("SELECT data FROM tasks WHERE id = ?", (task_id,)).fetchone()
+                if row is None:
+                    continue
+                task = json.loads(row[0])
+                task.update(fields)
+                updated.append(task)
+            conn.executemany("INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?)", map(self._row, updated))
+        return updated
+
+    def delete_many(self, task_ids):
+        """Delete many task rows in one transaction; return the deleted tasks."""
+        deleted = []
+        with closing(self._connect()) as conn, conn:
+            for task_id in task_ids:
+                row = conn.execute("SELECT data FROM tasks WHERE id = ?", (task_id,)).fetchone()
+                if row is not None:
+                    deleted.append(json.loads(row[0]))
+            conn.executemany("DELETE FROM tasks WHERE id = ?", [(task["id"],) for task in deleted])
+        return deleted
+
+    def delete_where(self, predicate):
+        """Delete every task for which predicate(task) is true in one transaction."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute("SELECT data FROM tasks ORDER BY id")
+            deleted = [task for task in (json.loads(row[0]) for row in rows) if predicate(task)]
+            conn.executemany("DELETE FROM tasks WHERE id = ?", [(task["id"],) for task in deleted])
+        return deleted
+
+    def delete(self, task_id):
+        """Delete one task row; return True if it existed."""
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,)).rowcount > 0
+
+    def replace_all(self, tasks):
+        """Replace the whole table with tasks in one transaction."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM tasks")
+            conn.executemany(
+                "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?)",
+                (self._row(task) for task in tasks),
+            )
+            next_id = tasks.next_id if isinstance(tasks, TaskList) else 1
+            self._bump_next_id(conn, max(next_id, self._next_id(conn)))
+
+class TaskStore:
+    """
+    One TaskList shared by every session of a server process.
+    
+    lock serializes changes and reloads of the shared list; hold it while
+    changing tasks in place or computing a view of them. A save only holds
+    it to copy the list and writes the copy after releasing it. version
+    moves on with every change or reload, so a session can tell whether
+    what it last rendered is out of date.
+    
+    With flush_ms set, changes made through the shared list are not written
+    on the caller's thread. A background writer thread coalesces them and
+    saves the whole list (or, with the journal engine, logs the changed
+    tasks) at most once every flush_ms milliseconds, and once more on
+    close() or at interpreter exit. flush() writes pending changes
+    right away; they are durable once it returns. The sqlite engine writes
+    each change in its own transaction and does not support this.
+    
+    The ids of tasks changed since the last write are kept, so if the store
+    is written elsewhere first, the pending tasks are replayed onto the
+    reloaded list (added or replaced as they are here, or deleted) and
+    written with the next save instead of being lost.
+    """
+
+    def __init__(self, file_path=None, engine=None, flush_ms=None):
+        self.engine = _resolve_engine(engine)
+        self.file_path = _default_path(file_path, self.engine)
+        if flush_ms is not None and self.engine == "sqlite":
+            raise ValueError("The sqlite engine does not support background writes")
+        self.flush_ms = flush_ms
+        self.lock = threading.RLock()
+        self.error = None
+        self._tasks = None
+        self._generation = 0
+        self._dirty = False
+        self._pending = set()
+        self._snapshots = 0
+        self._saving = {}
+        self._written = (0, None)
+        self._closed = False
+        self._wake = threading.Condition(self.lock)
+        self._writer = None
+        if flush_ms is not None:
+            atexit.register(self.close)
+
+    @property
+    def tasks(self):
+        """The shared TaskList, reloaded first if the store was written elsewhere."""
+        with self.lock:
+            if self._tasks is None or is_stale(self._tasks, self.file_path, self.engine):
+                pending = self._tasks if self._dirty else None
+                self._tasks = load_tasks(self.file_path, self.engine)
+                if pending is not None:
+                    # Another writer got there first; keep their version of
+                    # every other task and replay ours on top of it
+                    for task_id in self._pending:
+                        task = pending.get(task_id)
+                        if task is None:
+                            self._tasks.remove_by_id(task_id)
+                        else:
+                            self._tasks.put(task)
+                    self._tasks.next_id = max(self._tasks.next_id, pending.next_id)
+                if self.flush_ms is not None:
+                    self._tasks.writer = self
+                self._generation += 1
+            return self._tasks
+
+    @property
+    def version(self):
+        """(reload count, TaskList.version) of the shared list."""
+        with self.lock:
+            tasks = self.tasks
+            return (self._generation, tasks.version)
+
+    @property
+    def dirty(self):
+        """True while changes are waiting for the background writer."""
+        return self._dirty
+
+    def save(self):
+        """
+        Write the shared list to the store.
+        
+        The list is copied under lock and serialized and written outside
+        it, so sessions are not held up by the write. With the journal
+        engine only the tasks changed since the last write are copied and
+        appended to the log. A copy taken before one that is already
+        written is dropped, as the later one holds its changes too.
+        """
+        with self.lock:
+            tasks = self.tasks
+            self._snapshots += 1
+            number = self._snapshots
+            # Ids an earlier save is still writing are written again here,
+            # so that save can be dropped if this one gets there first
+            pending = self._pending.union(*self._saving.values())
+            self._saving[number] = pending
+            self._pending = set()
+            self._dirty = False
+            base, next_id = tasks.signature, tasks.next_id
+            if self.engine == "journal" and pending:
+                changed = [dict(task) for task in tasks if task.get("id") in pending]
+                records = [{"op": "add", "task": task} for task in changed]
+                records += [
+                    {"op": "delete", "id": task_id}
+                    for task_id in pending.difference(task["id"] for task in changed)
+                ]
+            else:
+                records, snapshot = None, [dict(task) for task in tasks]
+        try:
+            with _locked(self.file_path):
+                if number < self._written[0]:
+                    return
+                if store_signature(self.file_path, self.engine) not in (base, self._written[1]):
+                    raise TaskConflictError(f"{self.file_path} changed since these tasks were loaded")
+                if records is None:
+                    save_tasks(snapshot, self.file_path, self.engine)
+                else:
+                    _append_journal(self.file_path, records)
+                _bump_meta_next_id(self.file_path, next_id)
+                self._written = (number, store_signature(self.file_path, self.engine))
+        except BaseException:
+            with self.lock:
+                # Keep the changes for the next save, which reloads and replays them
+                self._pending |= pending
+                self._dirty = True
+            raise
+        finally:
+            with self.lock:
+                del self._saving[number]
+        with self.lock:
+            if self._tasks is tasks and self._written[0] == number:
+                tasks.signature = self._written[1]
+
+    def change(self, func, *args, **kwargs):
+        """
+        Call a row-level or batch function on the shared list under the lock.
+        
+        func is called as func(*args, file_path=..., engine=..., tasks=...,
+        **kwargs), e.g. store.change(toggle_completed, task_id).
+        """
+        with self.lock:
+            return func(*args, file_path=self.file_path, engine=self.engine, tasks=self.tasks, **kwargs)
+
+    def mark_dirty(self, task_ids=()):
+        """Note that the tasks with task_ids changed and wake the background writer."""
+        with self.lock:
+            self._pending.update(task_ids)
+            self._dirty = True
+            closed = self._closed
+            if not closed:
+                if self._writer is None:
+                    self._writer = threading.Thread(
+                        target=self._write_behind, name=f"TaskStore writer ({self.file_path})", daemon=True
+                    )
+                    self._writer.start()
+                self._wake.notify()
+        if closed:
+            self.save()
+
+    def flush(self):
+        """
+        Write pending changes now.
+        
+        Raises the error of a failed background write, if any.
+        """
+        with self.lock:
+            error, self.error = self.error, None
+            dirty = self._dirty
+        if dirty:
+            self.save()
+        if error is not None:
+            raise error
+
+    def close(self):
+        """Stop the background writer after writing pending changes."""
+        with self.lock:
+            self._closed = True
+            self._wake.notify()
+            writer = self._writer
+        if writer is not None and writer is not threading.current_thread():
+            writer.join()
+        atexit.unregister(self.close)
+        self.flush()
+
+    def _write_behind(self):
+        while True:
+            with self.lock:
+                self._wake.wait_for(lambda: self._dirty or self._closed)
+                if self._closed:
+                    return
+                # Changes made while waiting join this write
+                self._wake.wait_for(lambda: self._closed, self.flush_ms / 1000)
+                if self._closed:
+                    return
+                if not self._dirty:
+                    continue
+            try:
+                self.save()
+            except Exception as e:
+                with self.lock:
+                    self.error = e
+
+class TaskColumns:
+    """
+    A read-only columnar snapshot of tasks for analytic queries.
+    
+    category and priority become integer codes into the categories and
+    priorities name lists, completed a bool array and due_date an array of
+    day ordinals (0 for a task without a valid due date, which then sorts
+    and compares before every date, like the empty string does); an ids
+    array orders tasks due the same day. With NumPy these are ndarrays:
+    query() builds one boolean mask per condition, orders with lexsort
+    and counts() uses bincount, so no Python loop runs per task. Without
+    NumPy the same columns are stdlib arrays and the masks are plain lists.
+    
+    query() takes the same arguments as TaskList.query and returns the
+    original task objects in list order, so the filter, overdue and sort
+    functions of this module accept a TaskColumns too. The snapshot does
+    not follow later changes to the tasks; build a new one instead.
+    """
+
+    def __init__(self, tasks):
+        if isinstance(tasks, TaskTable):
+            self.priorities = list(tasks.names("priority"))
+            self.categories = list(tasks.names("category"))
+            priority, category = tasks._codes["priority"], tasks._codes["category"]
+            due, ids = tasks._due, tasks._ids
+            # A completed value the column cannot hold (code 2) counts as not completed
+            completed = tasks._completed.replace(b"\x02", b"\x00")
+        else:
+            tasks = tasks if isinstance(tasks, (list, tuple)) else list(tasks)
+            self.priorities = [None, *TASK_PRIORITIES]
+            self.categories = [None]
+            codes = {"priority": {p: i for i, p in enumerate(TASK_PRIORITIES, 1)}, "category": {}}
+            names = {"priority": self.priorities, "category": self.categories}
+
+            def encode(field, value):
+                code = codes[field].get(value) if type(value) is str else 0
+                if code is None:
+                    code = codes[field][value] = len(names[field])
+                    names[field].append(value)
+                return code
+
+            priority = array("H", [encode("priority", t.get("priority")) for t in tasks])
+            category = array("H", [encode("category", t.get("category")) for t in tasks])
+            due = array("i", [_date_ordinal(t.get("due_date", "")) or 0 for t in tasks])
+            ids = array("q", [_max_int_id([t.get("id")]) for t in tasks])
+            completed = bytes(bool(t.get("completed", False)) for t in tasks)
+        self.tasks = tasks
+        if np is not None:
+            self.priority = np.array(priority, dtype=np.uint16)
+            self.category = np.array(category, dtype=np.uint16)
+            self.due = np.array(due, dtype=np.int32)
+            self.ids = np.array(ids, dtype=np.int64)
+            self.completed = np.frombuffer(completed, dtype=np.bool_)
+        else:
+            self.priority, self.category, self.due, self.ids = priority, category, due, ids
+            self.completed = completed
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def _ordinal(self, value):
+        ordinal = _date_ordinal(value)
+        if ordinal is None:
+            raise ValueError(f"Expected a YYYY-MM-DD date, got {value!r}")
+        return ordinal
+
+    def mask(self, category=None, priority=None, completed=None, due_before=None, due_from=None):
+        """
+        Return the rows matching every given condition as a boolean mask.
+        
+        Takes the conditions of query(); the mask is a NumPy bool array, or
+        a list of bools without NumPy.
+        """
+        conditions = []
+        for column, names, value in ((self.category, self.categories, category),
+                                     (self.priority, self.priorities, priority)):
+            if value is not None:
+                if value not in names[1:]:
+                    return np.zeros(len(self), dtype=np.bool_) if np is not None else [False] * len(self)
+                conditions.append((column, operator.eq, names.index(value, 1)))
+        if completed is not None:
+            conditions.append((self.completed, operator.eq, bool(completed)))
+        if due_before is not None:
+            conditions.append((self.due, operator.lt, self._ordinal(due_before)))
+        if due_from is not None:
+            conditions.append((self.due, operator.ge, self._ordinal(due_from)))
+        if np is not None:
+            mask = np.ones(len(self), dtype=np.bool_)
+            for column, compare, value in conditions:
+                mask &= compare(column, value)
+            return mask
+        mask = [True] * len(self)
+        for column, compare, value in conditions:
+            mask = [m and compare(c, value) for m, c in zip(mask, column)]
+        return mask
+
+    def argsort_due(self, ascending=True, mask=None):
+        """Return row numbers ordered by due date, equal dates in id order."""
+        if np is not None:
+            rows = np.flatnonzero(mask) if mask is not None else np.arange(len(self))
+            due = self.due[rows]
+            return rows[np.lexsort((self.ids[rows], due if ascending else -due))]
+        rows = [i for i, m in enumerate(mask) if m] if mask is not None else range(len(self))
+        sign = 1 if ascending else -1
+        return sorted(rows, key=lambda i: (sign * self.due[i], self.ids[i]))
+
+    def rows(self, positions):
+        """Return the tasks at the given row numbers."""
+        tasks = self.tasks
+        return [tasks[i] for i in (positions.tolist() if np is not None else positions)]
+
+    def query(self, category=None, priority=None, completed=None,
+              due_before=None, due_from=None, order_by_due=False, ascending=True, limit=None):
+        """
+        Select tasks matching every given condition through column masks.
+        
+        Takes the same arguments as TaskList.query.
+        
+        Returns:
+            list: Matching tasks, in list order unless order_by_due
+        """
+        mask = self.mask(category, priority, completed, due_before, due_from)
+        if order_by_due:
+            return self.rows(self.argsort_due(ascending, mask)[:limit])
+        if np is not None:
+            return self.rows(np.flatnonzero(mask)[:limit])
+        return list(islice(compress(self.tasks, mask), limit))
+
+    def counts(self, today=None):
+        """
+        Count tasks by category and priority, completed and overdue.
+        
+        Args:
+            today: Date, YYYY-MM-DD string or clock to compare against (see _today)
+            
+        Returns:
+            TaskCounts: total, completed and overdue counts, and dicts of
+                category -> count and priority -> count (tasks without one are left out)
+        """
+        today = self._ordinal(_today(today))
+        if np is not None:
+            by_category = np.bincount(self.category, minlength=len(self.categories)).tolist()
+            by_priority = np.bincount(self.priority, minlength=len(self.priorities)).tolist()
+            completed = int(np.count_nonzero(self.completed))
+            overdue = int(np.count_nonzero(~self.completed & (self.due < today)))
+        else:
+            category, priority = Counter(self.category), Counter(self.priority)
+            by_category = [category[i] for i in range(len(self.categories))]
+            by_priority = [priority[i] for i in range(len(self.priorities))]
+            completed = self.completed.count(1)
+            overdue = sum(1 for c, d in zip(self.completed, self.due) if not c and d < today)
+        return TaskCounts(
+            total=len(self),
+            completed=completed,
+            overdue=overdue,
+            by_category={n: c for n, c in zip(self.categories[1:], by_category[1:]) if c},
+            by_priority={n: c for n, c in zip(self.priorities[1:], by_priority[1:]) if c},
+        )
+
+# Task containers whose query() the filter, due-date and sort functions defer to
+_QUERYABLE = (TaskList, TaskDatabase, TaskColumns)
+
+def open_task_db(file_path=None):
     """
-    Load tasks from a JSON file.
+    Open the SQLite task database used by the sqlite engine.
     
     Args:
-        file_path (str): Path to the JSON file containing tasks
+        file_path (str): Path to the database (default DEFAULT_TASKS_DB)
         
     Returns:
-        list: List of task dictionaries, empty list if file doesn't exist
+        TaskDatabase: Handle for querying and updating stored tasks
     """
-    if file_path is None:
-        file_path = DEFAULT_TASKS_FILE
-    try:
-        with open(file_path, "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
-    except json.JSONDecodeError:
-        # Handle corrupted JSON file
-        print(f"Warning: {file_path} contains invalid JSON. Creating new tasks list.")
-        # Reset corrupted file to empty list
-        with open(file_path, "w") as fw:
-            json.dump([], fw, indent=2)
-        return []
+    return TaskDatabase(file_path)
 
-def save_tasks(tasks, file_path=None):
+def migrate_json_to_sqlite(json_path=None, db_path=None):
     """
-    Save tasks to a JSON file.
+    Copy tasks from a tasks.json file (and its journal, if any) into SQLite.
     
     Args:
-        tasks (list): List of task dictionaries
-        file_path (str): Path to save the JSON file
+        json_path (str): Source JSON file (default DEFAULT_TASKS_FILE)
+        db_path (str): Target database (default DEFAULT_TASKS_DB)
+        
+    Returns:
+        int: Number of tasks migrated
     """
-    if file_path is None:
-        file_path = DEFAULT_TASKS_FILE
-    with open(file_path, "w") as f:
-        json.dump(tasks, f, indent=2)
+    tasks = load_tasks(json_path, engine="journal")
+    TaskDatabase(db_path).replace_all(tasks)
+    return len(tasks)
 
 def generate_unique_id(tasks):
     """
     Generate a unique ID for a new task.
     
+    A TaskList or TaskDatabase answers from its persisted counter in constant
+    time; a plain list falls back to scanning for the highest id.
+    
     Args:
         tasks (list): List of existing task dictionaries
         
     Returns:
         int: A unique ID for a new task
     """
-    if not tasks:
-        return 1
-    return max(task["id"] for task in tasks) + 1
+    if isinstance(tasks, TaskList):
+        return tasks.next_id
+    if isinstance(tasks, TaskDatabase):
+        return tasks.next_id()
+    return _next_id_of(tasks)
+
+def allocate_ids(n, file_path=None, engine=None):
+    """
+    Reserve n consecutive task ids from the store's persisted counter.
+    
+    Args:
+        n (int): Number of ids to reserve
+        file_path (str): Path of the task store
+        engine (str): Storage engine (default DEFAULT_STORAGE_ENGINE)
+        
+    Returns:
+        range: The reserved ids
+    """
+    if n < 0:
+        raise ValueError("n must not be negative")
+    engine = _resolve_engine(engine)
+    file_path = _default_path(file_path, engine)
+    if engine == "sqlite":
+        return TaskDatabase(file_path).allocate_ids(n)
+    with _locked(file_path):
+        meta = _read_meta(file_path)
+        start = meta.get("next_id")
+        if start is None:
+            # Stores written before the counter existed: derive it once
+            start = load_tasks(file_path, engine).next_id
+        meta["next_id"] = start + n
+        _write_meta(file_path, meta)
+    return range(start, start + n)
+
+def reserve_task_id(tasks=None, file_path=None, engine=None):
+    """
+    Reserve the id of a new task from the store's persisted counter.
+    
+    Unlike generate_unique_id, which reads the caller's copy of the tasks,
+    the id is taken under the store lock (or in one sqlite transaction), so
+    processes holding stale copies of the store never hand out the same
+    id. The counter is first raised past every id in tasks, so tasks added
+    to that copy but not written yet are not reused either.
+    
+    Args:
+        tasks (iterable): The caller's copy of the tasks, if any; a
+            TaskList's next_id moves past the reserved id
+        file_path (str): Path of the task store
+        engine (str): Storage engine (default DEFAULT_STORAGE_ENGINE)
+        
+    Returns:
+        int: The reserved id
+    """
+    engine = _resolve_engine(engine)
+    file_path = _default_path(file_path, engine)
+    if isinstance(tasks, TaskDatabase):
+        return tasks.allocate_ids(1)[0]
+    with _locked(file_path):
+        if tasks is not None and engine != "sqlite":
+            _bump_meta_next_id(file_path, _next_id_of(tasks))
+        task_id = allocate_ids(1, file_path, engine)[0]
+    if isinstance(tasks, TaskList):
+        tasks.next_id = max(tasks.next_id, task_id + 1)
+    return task_id
+
+def _resolve_format(path, format):
+    """Return the transfer format, inferring it from the file extension."""
+    if format is None:
+        format = TRANSFER_FORMATS.get(os.path.splitext(path)[1].lower())
+    if format not in TRANSFER_FORMATS.values():
+        raise ValueError(f"Unknown task file format for {path}: {format}")
+    return format
+
+def _read_records(f, format):
+    """Yield raw records one at a time from an open JSON Lines or CSV file."""
+    if format == "csv":
+        yield from csv.DictReader(f)
+        return
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+def _parse_completed(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("", "0", "false", "no"):
+        return False
+    if text in ("1", "true", "yes"):
+        return True
+    raise ValueError(f"invalid completed value {value!r}")
+
+def validate_task_record(record):
+    """
+    Check and normalize an imported task record.
+    
+    Any incoming "id" is dropped; import_tasks assigns fresh ids.
+    
+    Args:
+        record (dict): Raw record from a JSON Lines or CSV file
+        
+    Returns:
+        dict: Task fields in TASK_FIELDS order, without "id"
+        
+    Raises:
+        ValueError: If the record is not a dict, or a field is missing or
+            malformed: the category must be a string and the due date a
+            canonical YYYY-MM-DD date
+    """
+    if not isinstance(record, dict):
+        raise ValueError(f"expected an object, got {type(record).__name__}")
+    try:
+        return _validated_record(record)
+    except TypeError as e:
+        raise ValueError(str(e)) from None
+
+def _validated_record(record):
+    title = str(record.get("title") or "").strip()
+    if not title:
+        raise ValueError("title is required")
+    priority = record.get("priority") or "Medium"
+    if priority not in TASK_PRIORITIES:
+        raise ValueError(f"invalid priority {priority!r}")
+    category = record.get("category") or "Other"
+    if not isinstance(category, str):
+        raise ValueError(f"invalid category {category!r}")
+    due_date = record.get("due_date") or ""
+    # Only canonical YYYY-MM-DD dates, which compare and sort as strings
+    if due_date and _date_ordinal(due_date) is None:
+        raise ValueError(f"invalid due_date {due_date!r}")
+    return {
+        "title": title,
+        "description": str(record.get("description") or ""),
+        "priority": priority,
+        "category": category,
+        "due_date": due_date,
+        "completed": _parse_completed(record.get("completed", False)),
+        "created_at": record.get("created_at") or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+def _validated_chunks(f, format, chunk_size):
+    """Yield lists of validated records, chunk_size at a time."""
+    records = _read_records(f, format)
+    line = 0
+    while True:
+        chunk = []
+        for record in islice(records, chunk_size):
+            line += 1
+            try:
+                chunk.append(validate_task_record(record))
+            except ValueError as e:
+                raise ValueError(f"Record {line}: {e}") from None
+        if not chunk:
+            return
+        yield chunk
+
+def import_tasks(path, format=None, file_path=None, engine=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Bulk-import tasks from a JSON Lines or CSV file.
+    
+    Records are streamed and validated chunk by chunk, and every chunk gets
+    a block of fresh ids. Nothing is committed if any record is invalid.
+    The sqlite engine inserts everything in one transaction and the journal
+    engine appends one batch to its log, so memory stays flat. The json
+    engine necessarily rewrites the whole file once at the end.
+    
+    Args:
+        path (str): File to import
+        format (str): "jsonl" or "csv" (default: inferred from the extension)
+        file_path (str): Path of the task store
+        engine (str): Storage engine (default DEFAULT_STORAGE_ENGINE)
+        chunk_size (int): Records validated and inserted per batch
+        
+    Returns:
+        int: Number of tasks imported
+    """
+    format = _resolve_format(path, format)
+    engine = _resolve_engine(engine)
+    file_path = _default_path(file_path, engine)
+    count = 0
+    with open(path, "r", newline="") as f:
+        chunks = _validated_chunks(f, format, chunk_size)
+        if engine == "sqlite":
+            return TaskDatabase(file_path).insert_chunks(chunks)
+        if engine == "json":
+            with _locked(file_path):
+                tasks = load_tasks(file_path, engine)
+                for chunk in chunks:
+                    ids = allocate_ids(len(chunk), file_path, engine)
+                    tasks.extend(dict(id=i, **task) for i, task in zip(ids, chunk))
+                    count += len(chunk)
+                save_tasks(tasks, file_path, engine)
+            return count
+        # Stage the records next to the log, then append them in one go
+        staging_path = _journal_path(file_path) + ".import"
+        try:
+            with open(staging_path, "w") as staging:
+                for chunk in chunks:
+                    ids = allocate_ids(len(chunk), file_path, engine)
+                    staging.writelines(
+                        json.dumps({"op": "add", "task": dict(id=i, **task)}, separators=(",", ":")) + "\n"
+                        for i, task in zip(ids, chunk)
+                    )
+                    count += len(chunk)
+            with _locked(file_path):
+                with open(staging_path, "r") as staging, open(_journal_path(file_path), "a") as log:
+                    shutil.copyfileobj(staging, log)
+                    log.flush()
+                    os.fsync(log.fileno())
+        finally:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+    _maybe_compact_journal(file_path)
+    return count
+
+def export_tasks(path, format=None, file_path=None, engine=None):
+    """
+    Export every stored task to a JSON Lines or CSV file.
+    
+    Tasks are read through iter_tasks and written one at a time, so the json
+    and sqlite engines never hold the whole store in memory.
+    
+    Args:
+        path (str): File to write
+        format (str): "jsonl" or "csv" (default: inferred from the extension)
+        file_path (str): Path of the task store
+        engine (str): Storage engine (default DEFAULT_STORAGE_ENGINE)
+        
+    Returns:
+        int: Number of tasks exported
+    """
+    format = _resolve_format(path, format)
+    engine = _resolve_engine(engine)
+    file_path = _default_path(file_path, engine)
+    count = 0
+    with open(path, "w", newline="") as f:
+        if format == "csv":
+            writer = csv.DictWriter(f, fieldnames=TASK_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+        for task in iter_tasks(file_path, engine):
+            if format == "csv":
+                writer.writerow(task)
+            else:
+                f.write(json.dumps(task) + "\n")
+            count += 1
+    return count
 
 def filter_tasks_by_priority(tasks, priority):
     """
     Filter tasks by priority level.
     
     Args:
-        tasks (list): List of task dictionaries
+        tasks (iterable): Task dictionaries, e.g. a list or iter_tasks()
         priority (str): Priority level to filter by (High, Medium, Low)
         
     Returns:
         list: Filtered list of tasks matching the priority
     """
+    if isinstance(tasks, _QUERYABLE):
+        return tasks.query(priority=priority)
     return [task for task in tasks if task.get("priority") == priority]
 
 def filter_tasks_by_category(tasks, category):
@@ -75,12 +2751,14 @@ def filter_tasks_by_category(tasks, category):
     Filter tasks by category.
     
     Args:
-        tasks (list): List of task dictionaries
+        tasks (iterable): Task dictionaries, e.g. a list or iter_tasks()
         category (str): Category to filter by
         
     Returns:
         list: Filtered list of tasks matching the category
     """
+    if isinstance(tasks, _QUERYABLE):
+        return tasks.query(category=category)
     return [task for task in tasks if task.get("category") == category]
 
 def filter_tasks_by_completion(tasks, completed=True):
@@ -88,85 +2766,553 @@ def filter_tasks_by_completion(tasks, completed=True):
     Filter tasks by completion status.
     
     Args:
-        tasks (list): List of task dictionaries
+        tasks (iterable): Task dictionaries, e.g. a list or iter_tasks()
         completed (bool): Completion status to filter by
         
     Returns:
         list: Filtered list of tasks matching the completion status
     """
+    if isinstance(tasks, _QUERYABLE):
+        return tasks.query(completed=completed)
     return [task for task in tasks if task.get("completed") == completed]
 
 def search_tasks(tasks, query):
     """
     Search tasks by a text query in title and description.
     
+    A TaskList finds the same tasks through its inverted token index and
+    ranks them by relevance instead of keeping list order (see
+    TaskList.search).
+    
     Args:
-        tasks (list): List of task dictionaries
+        tasks (iterable): Task dictionaries, e.g. a list or iter_tasks()
         query (str): Search query
         
     Returns:
         list: Filtered list of tasks matching the search query
     """
+    if isinstance(tasks, TaskList):
+        return tasks.search(query)
+    return list(filter(_text_matcher(query), tasks))
+
+def _contains_text(text, query):
+    """Return True if query (lowercase) appears in text, ignoring case."""
+    return query in str(text or "").lower()
+
+def _text_matcher(query):
+    """Return a test for query appearing in a task's title or description, ignoring case."""
     query = query.lower()
-    return [
-        task for task in tasks 
-        if query in task.get("title", "").lower() or 
-           query in task.get("description", "").lower()
-    ]
+    return lambda task: _contains_text(task.get("title"), query) or _contains_text(task.get("description"), query)
+
+
+def _today(today=None):
+    """
+    Return today's date as YYYY-MM-DD.
+    
+    today may be that string already, a date or datetime, or a clock: a
+    callable returning one, such as datetime.now (the default).
+    """
+    if today is None:
+        today = datetime.now
+    if callable(today):
+        today = today()
+    if isinstance(today, str):
+        return today
+    return today.strftime("%Y-%m-%d")
 
 
-def get_overdue_tasks(tasks):
+def get_overdue_tasks(tasks, today=None):
     """
     Get tasks that are past their due date and not completed.
     
     Args:
-        tasks (list): List of task dictionaries
+        tasks (iterable): Task dictionaries, e.g. a list or iter_tasks()
+        today: Date, YYYY-MM-DD string or clock to compare against (see _today)
         
     Returns:
         list: List of overdue tasks
     """
-    today = datetime.now().strftime("%Y-%m-%d")
+    today = _today(today)
+    if isinstance(tasks, _QUERYABLE):
+        return tasks.query(completed=False, due_before=today, order_by_due=True)
     return [
         task for task in tasks 
         if not task.get("completed", False) and 
-           task.get("due_date", "") < today
+           _due_key(task) < today
     ]
 
 
-def get_upcoming_tasks(tasks):
+def get_upcoming_tasks(tasks, today=None):
     """
     Return tasks with due_date >= today (YYYY-MM-DD) and not completed.
     """
-    today = datetime.now().strftime("%Y-%m-%d")
+    today = _today(today)
+    if isinstance(tasks, _QUERYABLE):
+        return tasks.query(completed=False, due_from=today, order_by_due=True)
     return [
         task for task in tasks
-        if not task.get("completed", False) and task.get("due_date", "") >= today
+        if not task.get("completed", False) and _due_key(task) >= today
     ]
 
 
-def is_task_overdue(task):
+def partition_by_due(tasks, today=None):
+    """
+    Split tasks into overdue, due today and upcoming in a single pass.
+    
+    The date is read once, so every task is compared against the same
+    day even if the scan crosses midnight. Input order is kept in each
+    part.
+    
+    Args:
+        tasks (iterable): Task dictionaries
+        today: Date, YYYY-MM-DD string or clock to compare against (see _today)
+        
+    Returns:
+        DuePartition: Lists of the overdue tasks (not completed, due before
+        today), the tasks due today, and all others (due later, or completed
+        with a past due date)
+    """
+    today = _today(today)
+    overdue, due_today, upcoming = [], [], []
+    for task in tasks:
+        due = _due_key(task)
+        if due == today:
+            due_today.append(task)
+        elif due < today and not task.get("completed", False):
+            overdue.append(task)
+        else:
+            upcoming.append(task)
+    return DuePartition(overdue, due_today, upcoming)
+
+
+def get_tasks_due_between(tasks, start, end):
+    """
+    Get tasks due from start through end, in due date order.
+    
+    Args:
+        tasks (iterable): Task dictionaries, a TaskList or a TaskDatabase
+        start (str): First due date included, YYYY-MM-DD
+        end (str): Last due date included, YYYY-MM-DD
+        
+    Returns:
+        list: Tasks with start <= due_date <= end, ordered by due date
+    """
+    before = (datetime.strptime(end, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+    if isinstance(tasks, _QUERYABLE):
+        return tasks.query(due_from=start, due_before=before, order_by_due=True)
+    return sorted(
+        (task for task in tasks if start <= _due_key(task) < before),
+        key=_due_key,
+    )
+
+
+def get_tasks_due_within(tasks, days, today=None):
+    """
+    Get tasks due from today through the next days days, in due date order.
+    """
+    start = _today(today)
+    end = datetime.strptime(start, "%Y-%m-%d") + timedelta(days=days)
+    return get_tasks_due_between(tasks, start, end.strftime("%Y-%m-%d"))
+
+
+def is_task_overdue(task, today=None):
     """
     Check if a single task is overdue (due_date before today and not completed).
     """
-    today = datetime.now().strftime("%Y-%m-%d")
-    return not task.get("completed", False) and task.get("due_date", "") < today
+    today = _today(today)
+    return not task.get("completed", False) and _due_key(task) < today
 
 
 def sort_tasks_by_due_date(tasks, ascending=True):
     """
     Sort tasks by their due_date string (YYYY-MM-DD).
+    
+    A TaskList reads the order off its due-date index instead of sorting,
+    and a TaskColumns argsorts its due-date column; both keep tasks due the
+    same day in id order. Other iterables are sorted stably, so those keep
+    the order they came in, in both directions.
     """
+    if isinstance(tasks, _QUERYABLE):
+        return tasks.query(order_by_due=True, ascending=ascending)
     return sorted(
         tasks,
-        key=lambda t: t.get("due_date", ""),
+        key=_due_key,
         reverse=not ascending
     )
 
+def next_due(tasks, k, ascending=True, **conditions):
+    """
+    Return the k tasks due soonest (or, with ascending=False, latest).
+    
+    Tasks due the same day are ordered by priority ("High" first), then by
+    id, in both directions, so the result is stable across calls. Unlike
+    sort_tasks_by_due_date nothing past the first k is ordered: a TaskList
+    reads them off its due-date index, a TaskDatabase runs one LIMIT
+    query and anything else keeps a heap of k tasks, O(N log k).
+    
+    Args:
+        tasks (iterable): Task dictionaries, a TaskList, TaskDatabase or TaskColumns
+        k (int): Number of tasks to return
+        ascending (bool): Earliest due dates first
+        **conditions: category, priority, completed, due_before and due_from
+            conditions as taken by TaskList.query; a TaskList or
+            TaskDatabase answers them from its indexes
+        
+    Returns:
+        list: At most k matching tasks in due date, priority, id order
+    """
+    if isinstance(tasks, (TaskList, TaskDatabase)):
+        return tasks.next_due(k, ascending, **conditions)
+    if conditions:
+        due_before, due_from = conditions.pop("due_before", None), conditions.pop("due_from", None)
+        query = TaskQuery(tasks).where(**{f: v for f, v in conditions.items() if v is not None})
+        if due_before is not None:
+            query = query.due_before(due_before)
+        if due_from is not None:
+            query = query.due_from(due_from)
+        tasks = query
+    elif isinstance(tasks, TaskColumns):
+        tasks = tasks.tasks
+    if k <= 0:
+        return []
+    return _top_due(tasks, k, ascending)
+
+def get_categories(tasks):
+    """
+    Return the sorted distinct categories of the tasks.
+    
+    A TaskList memoizes the result until its next mutation, and a
+    TaskDatabase answers from its category index.
+    """
+    if isinstance(tasks, TaskDatabase):
+        return tasks.categories()
+    if isinstance(tasks, TaskList):
+        return list(tasks.cached(("categories",), lambda: sorted({t["category"] for t in tasks})))
+    return sorted({task["category"] for task in tasks})
+
+def get_task_counts(tasks, today=None):
+    """
+    Count tasks by category and priority, completed and overdue.
+    
+    A TaskList reads its running counters and a TaskDatabase aggregates in
+    SQL, so neither visits every task; other iterables go through a
+    TaskColumns snapshot.
+    
+    Args:
+        tasks (iterable): Task dictionaries, a TaskList, TaskDatabase or TaskColumns
+        today: Date, YYYY-MM-DD string or clock to compare against (see _today)
+        
+    Returns:
+        TaskCounts: total, completed and overdue counts, and dicts of
+            category -> count and priority -> count
+    """
+    if not isinstance(tasks, _QUERYABLE):
+        tasks = TaskColumns(tasks)
+    return tasks.counts(today)
+
+def get_completion_history(tasks):
+    """
+    Count the tasks created per day and how many of those are completed.
+    
+    Args:
+        tasks (iterable): Task dictionaries, a TaskList or a TaskDatabase
+        
+    Returns:
+        list: (YYYY-MM-DD creation day, created, completed) tuples, oldest day first
+    """
+    if isinstance(tasks, (TaskList, TaskDatabase)):
+        return tasks.completion_history()
+    created, completed = Counter(), Counter()
+    for task in tasks:
+        day = str(task.get("created_at", ""))[:10]
+        created[day] += 1
+        completed[day] += bool(task.get("completed", False))
+    return [(day, n, completed[day]) for day, n in sorted(created.items())]
+
+class TaskQuery:
+    """
+    A lazy, composable task query.
+    
+    Each method returns a new TaskQuery; nothing runs until the query is
+    iterated or all() is called, e.g.
+    
+        TaskQuery(tasks).where(category="Work").completed(False)
+            .order_by("due_date").limit(20).all()
+    
+    On a TaskList, TaskDatabase or TaskColumns the category, priority,
+    completed and due-date conditions, a due_date ordering and the limit
+    go to its query(), which answers them from its indexes (or in SQL);
+    the other conditions then filter that result lazily. Any other
+    iterable is read in a single pass through a chain of lazy filters, one
+    per condition. An ordering the source cannot provide is a sort, or a heap
+    selection of the top limit tasks (heapq.nsmallest/nlargest, which keep
+    the order of equal keys like a stable sort) when there is a limit.
+    No intermediate list is built between the steps.
+    
+    Unordered results come back in the order of the source; TaskList and
+    TaskDatabase give id order.
+    """
+
+    def __init__(self, tasks):
+        self._tasks = tasks
+        self._fields = {}
+        self._predicates = ()
+        self._due_before = None
+        self._due_from = None
+        self._order = None
+        self._ascending = True
+        self._limit = None
+
+    def _copy(self, **changes):
+        query = TaskQuery.__new__(TaskQuery)
+        query.__dict__.update(self.__dict__, **changes)
+        return query
+
+    def where(self, predicate=None, **fields):
+        """
+        Keep tasks whose fields equal the given values and, if given, for
+        which predicate(task) is true.
+        """
+        predicates = self._predicates + ((predicate,) if predicate is not None else ())
+        return self._copy(_fields=dict(self._fields, **fields), _predicates=predicates)
+
+    def completed(self, completed=True):
+        """Keep tasks with the given completion status."""
+        return self.where(completed=bool(completed))
+
+    def due_before(self, day):
+        """Keep tasks with due_date < day (YYYY-MM-DD)."""
+        return self._copy(_due_before=day)
+
+    def due_from(self, day):
+        """Keep tasks with due_date >= day (YYYY-MM-DD)."""
+        return self._copy(_due_from=day)
+
+    def order_by(self, field, ascending=True):
+        """Order the result by a task field; tasks without it sort first."""
+        return self._copy(_order=field, _ascending=ascending)
+
+    def limit(self, n):
+        """Return at most n tasks."""
+        return self._copy(_limit=n)
+
+    def __iter__(self):
+        return iter(self.all())
+
+    def _filter(self, rows, fields, due_range=True):
+        """
+        Chain one lazy filter per condition over rows.
+        
+        Each task is tested until a condition fails, and only survivors
+        reach the next filter, so no list is built in between.
+        """
+        for field, value in fields.items():
+            if field == "completed":
+                rows = filter(lambda t, v=bool(value): bool(t.get("completed", False)) is v, rows)
+            else:
+                rows = filter(lambda t, f=field, v=value: t.get(f) == v, rows)
+        if due_range and self._due_from is not None:
+            rows = filter(lambda t, d=self._due_from: _due_key(t) >= d, rows)
+        if due_range and self._due_before is not None:
+            rows = filter(lambda t, d=self._due_before: _due_key(t) < d, rows)
+        for predicate in self._predicates:
+            rows = filter(predicate, rows)
+        return rows
+
+    def all(self):
+        """
+        Run the query.
+        
+        Returns:
+            list: The matching tasks
+        """
+        tasks, order, limit = self._tasks, self._order, self._limit
+        if isinstance(tasks, _QUERYABLE):
+            indexed = {k: v for k, v in self._fields.items() if k in INDEXED_FIELDS}
+            rest = {k: v for k, v in self._fields.items() if k not in INDEXED_FIELDS}
+            presorted = order in (None, "due_date")
+            filtered = rest or self._predicates
+            rows = tasks.query(
+                due_before=self._due_before,
+                due_from=self._due_from,
+                order_by_due=order == "due_date",
+                ascending=self._ascending,
+                limit=limit if presorted and not filtered else None,
+                **indexed,
+            )
+            if filtered:
+                rows = self._filter(rows, rest, due_range=False)
+        else:
+            presorted = order is None
+            rows = self._filter(tasks, self._fields)
+        if presorted:
+            return list(islice(rows, limit))
+        if order == "due_date":
+            key = _due_key
+        else:
+            key = lambda task: task.get(order, "")
+        if limit is None:
+            return sorted(rows, key=key, reverse=not self._ascending)
+        return (heapq.nsmallest if self._ascending else heapq.nlargest)(limit, rows, key=key)
+
+def get_task_view(tasks, category="All", priority="All", show_completed=False, ascending=True, search="",
+                  today=None, limit=None):
+    """
+    Filter, sort and split tasks with partition_by_due.
+    
+    On a TaskList the view is memoized under (filters, sort order, search,
+    today) and recomputed only after the list is mutated or the date
+    changes, so Streamlit reruns that leave the tasks alone cost a dict
+    lookup. The filters and the due-date order run as one TaskQuery, so a
+    TaskList or TaskDatabase answers them from its indexes. A search on a
+    TaskList is ranked by relevance instead of due date.
+    
+    Args:
+        tasks (iterable): Task dictionaries, a TaskList or a TaskDatabase
+        category (str): Category to keep, or "All"
+        priority (str): Priority to keep, or "All"
+        show_completed (bool): Whether completed tasks are included
+        ascending (bool): Sort order of the due dates
+        search (str): Text passed to search_tasks, or "" for no search
+        today: Date, YYYY-MM-DD string or clock to split on (see _today)
+        limit (int): Keep only the first limit tasks of each section, picked
+            and ordered by next_due (ties by priority, then id), instead of
+            sorting every match; filtered then keeps the order of the source
+        
+    Returns:
+        TaskView: Tuples of the filtered, overdue, due today and upcoming tasks
+    """
+    today = _today(today)
+    ranked = isinstance(tasks, TaskList) and bool(search)
+
+    def compute():
+        if ranked:
+            query = TaskQuery(tasks.search(search))
+        else:
+            query = TaskQuery(tasks)
+            if limit is None:
+                query = query.order_by("due_date", ascending)
+            if search:
+                query = query.where(_text_matcher(search))
+        if category != "All":
+            query = query.where(category=category)
+        if priority != "All":
+            query = query.where(priority=priority)
+        if not show_completed:
+            query = query.completed(False)
+        if limit is None or ranked:
+            return _split_view(query.all(), today)
+        filtered = query.all()
+        if search or not isinstance(tasks, (TaskList, TaskDatabase)):
+            sections = (next_due(part, limit, ascending) for part in partition_by_due(filtered, today))
+        else:
+            conditions = _view_conditions(category, priority, show_completed)
+            sections = _due_sections(tasks, limit, ascending, today, conditions)
+        return TaskView(tuple(filtered), *map(tuple, sections))
+
+    if isinstance(tasks, TaskList):
+        key = ("view", category, priority, show_completed, ascending, search, today, limit)
+        return tasks.cached(key, compute)
+    return compute()
+
+def get_task_page(tasks, page, page_size, category="All", priority="All", show_completed=False, ascending=True,
+                  search="", today=None):
+    """
+    Return one page of the main view without building the whole view.
+    
+    The overdue, due today and upcoming sections of get_task_view(limit=)
+    are laid end to end and cut into pages of page_size tasks. A
+    TaskDatabase runs one COUNT(*) query for the total and one LIMIT/OFFSET
+    query for the rows of the page (see TaskDatabase.view_page), so no
+    other row is fetched. A TaskList counts the matches off its index sets
+    (see TaskList.count) and picks the tasks up to the end of the page with
+    next_due, memoized like get_task_view. A search, or any other source,
+    goes through get_task_view. A page past the last one reads the last page.
+    
+    Args:
+        tasks (iterable): Task dictionaries, a TaskList or a TaskDatabase
+        page (int): 1-based page number
+        page_size (int): Tasks per page
+        category, priority, show_completed, ascending, search, today:
+            As taken by get_task_view
+        
+    Returns:
+        TaskPage: The number of matching tasks, and the overdue, due today
+        and upcoming tasks of the page
+    """
+    today = _today(today)
+    conditions = _view_conditions(category, priority, show_completed)
+    if isinstance(tasks, TaskDatabase):
+        total = tasks.count(**conditions, search=search)
+        page = _last_page(page, page_size, total)
+        rows = tasks.view_page(today, (page - 1) * page_size, page_size, ascending, search=search, **conditions)
+        return TaskPage(total, *partition_by_due(rows, today))
+    if isinstance(tasks, TaskList) and not search:
+        def compute():
+            total = tasks.count(**conditions)
+            last = _last_page(page, page_size, total)
+            sections = _due_sections(tasks, last * page_size, ascending, today, conditions)
+            return TaskPage(total, *_page_of(sections, (last - 1) * page_size, page_size))
+
+        key = ("page", page, page_size, category, priority, show_completed, ascending, today)
+        return tasks.cached(key, compute)
+    filtered, *sections = get_task_view(
+        tasks, category, priority, show_completed, ascending, search, today, limit=page * page_size
+    )
+    page = _last_page(page, page_size, len(filtered))
+    return TaskPage(len(filtered), *_page_of(sections, (page - 1) * page_size, page_size))
+
+def _last_page(page, page_size, total):
+    """Clamp a 1-based page number to the pages that total tasks fill."""
+    return min(max(page, 1), max(1, -(-total // page_size)))
+
+def _page_of(sections, offset, size):
+    """Return the size tasks from offset on of the sections laid end to end, split like the sections."""
+    parts = []
+    for part in sections:
+        parts.append(list(part[max(offset, 0):max(offset + size, 0)]))
+        offset -= len(part)
+    return parts
+
+def _view_conditions(category, priority, show_completed):
+    """Return the query() conditions of get_task_view's filters."""
+    return {
+        "category": None if category == "All" else category,
+        "priority": None if priority == "All" else priority,
+        "completed": None if show_completed else False,
+    }
+
+def _due_sections(tasks, k, ascending, today, conditions):
+    """
+    Return the first k tasks of each partition_by_due part in next_due order.
+    
+    Each part is a due-date range of its own next_due call, so a TaskList
+    or TaskDatabase reads only those k tasks (and the ties of the last
+    day) off its due-date index.
+    """
+    tomorrow = (datetime.strptime(today, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+    overdue = next_due(tasks, k, ascending, **dict(conditions, completed=False), due_before=today)
+    due_today = next_due(tasks, k, ascending, **conditions, due_from=today, due_before=tomorrow)
+    upcoming = next_due(tasks, k, ascending, **conditions, due_from=tomorrow)
+    if conditions.get("completed") is not False:
+        # Completed tasks past their due date are listed with the upcoming ones
+        done = next_due(tasks, k, ascending, **dict(conditions, completed=True), due_before=today)
+        upcoming = _top_due(chain(upcoming, done), k, ascending)
+    return DuePartition(overdue, due_today, upcoming)
+
+def _split_view(filtered, today):
+    return TaskView(tuple(filtered), *map(tuple, partition_by_due(filtered, today)))
+
 def edit_task(tasks, task_id, updates):
     """
     Remove the old task and insert a new one with updated fields,
     preserving any fields not explicitly updated.
+    
+    A TaskList is updated in place through its id index instead.
     """ 
+    if isinstance(tasks, TaskList):
+        tasks.update_by_id(task_id, updates)
+        return tasks
     original = None
     # Find and remove the original task
     new_tasks = []
@@ -184,3 +3330,205 @@ def edit_task(tasks, task_id, updates):
     # Append the updated task
     new_tasks.append(updated_task)
     return new_tasks
+
+def _change_task(task_id, make_fields, file_path, engine, tasks=None):
+    """Apply make_fields(task) to one stored task and persist just that change."""
+    engine = _resolve_engine(engine)
+    file_path = _default_path(file_path, engine)
+    if engine == "sqlite":
+        db = TaskDatabase(file_path)
+        task = db.get(task_id)
+        if task is None:
+            return None
+        return db.update(task_id, {k: v for k, v in make_fields(task).items() if k != "id"})
+    with _locked_for(tasks, file_path):
+        tasks = _synced_or_load(tasks, file_path, engine)
+        task = tasks.get(task_id)
+        if task is None:
+            return None
+        fields = {k: v for k, v in make_fields(task).items() if k != "id"}
+        tasks.update_by_id(task_id, fields)
+        if not append_task_change("update", dict(fields, id=task_id), file_path, engine, tasks):
+            save_tasks(tasks, file_path, engine)
+        return task
+
+def apply_task_changes(changes, file_path=None, engine=None, tasks=None):
+    """
+    Update fields of many stored tasks with a single write.
+    
+    The json engine rewrites the file once, the journal engine appends all
+    records in one write and the sqlite engine uses one transaction.
+    
+    Args:
+        changes (dict): Task id -> fields to merge into that task ("id" is ignored)
+        file_path (str): Path of the task store
+        engine (str): Storage engine (default DEFAULT_STORAGE_ENGINE)
+        tasks (TaskList): In-memory copy of the store, changed in place instead
+            of re-reading the file while it is in sync (see is_stale)
+        
+    Returns:
+        list: The updated tasks; ids with no stored task are skipped
+    """
+    engine = _resolve_engine(engine)
+    file_path = _default_path(file_path, engine)
+    changes = {
+        task_id: {k: v for k, v in fields.items() if k != "id"}
+        for task_id, fields in changes.items()
+    }
+    if engine == "sqlite":
+        return TaskDatabase(file_path).update_many(changes)
+    with _locked_for(tasks, file_path):
+        tasks = _synced_or_load(tasks, file_path, engine)
+        updated = [tasks.update_by_id(task_id, fields) for task_id, fields in changes.items()]
+        updated = [task for task in updated if task is not None]
+        if not updated or _deferred(tasks, file_path, [task["id"] for task in updated]):
+            return updated
+        if engine == "journal":
+            _append_journal(file_path, [
+                {"op": "update", "id": task["id"], "fields": changes[task["id"]]} for task in updated
+            ])
+            tasks.signature = store_signature(file_path, engine)
+        else:
+            save_tasks(tasks, file_path, engine)
+        return updated
+
+def bulk_update(task_ids, fields, file_path=None, engine=None, tasks=None):
+    """
+    Merge the same fields into many stored tasks with a single write.
+    
+    Args:
+        task_ids (iterable): IDs of the tasks to update
+        fields (dict): Fields to merge into each task ("id" is ignored)
+        file_path (str): Path of the task store
+        engine (str): Storage engine (default DEFAULT_STORAGE_ENGINE)
+        tasks (TaskList): In-memory copy of the store, changed in place instead
+            of re-reading the file while it is in sync (see is_stale)
+        
+    Returns:
+        list: The updated tasks; ids with no stored task are skipped
+    """
+    return apply_task_changes({task_id: fields for task_id in task_ids}, file_path, engine, tasks)
+
+def bulk_delete(task_ids, file_path=None, engine=None, tasks=None):
+    """
+    Delete many stored tasks with a single write.
+    
+    Args:
+        task_ids (iterable): IDs of the tasks to delete
+        file_path (str): Path of the task store
+        engine (str): Storage engine (default DEFAULT_STORAGE_ENGINE)
+        tasks (TaskList): In-memory copy of the store, changed in place instead
+            of re-reading the file while it is in sync (see is_stale)
+        
+    Returns:
+        list: The deleted tasks; ids with no stored task are skipped
+    """
+    task_ids = set(task_ids)
+    if _resolve_engine(engine) == "sqlite":
+        return TaskDatabase(_default_path(file_path, "sqlite")).delete_many(sorted(task_ids))
+    return bulk_delete_where(lambda task: task.get("id") in task_ids, file_path, engine, tasks)
+
+def bulk_delete_where(predicate, file_path=None, engine=None, tasks=None):
+    """
+    Delete every stored task for which predicate(task) is true, with a single write.
+    
+    Args:
+        predicate (callable): Called with each task dictionary
+        file_path (str): Path of the task store
+        engine (str): Storage engine (default DEFAULT_STORAGE_ENGINE)
+        tasks (TaskList): In-memory copy of the store, changed in place instead
+            of re-reading the file while it is in sync (see is_stale)
+        
+    Returns:
+        list: The deleted tasks
+    """
+    engine = _resolve_engine(engine)
+    file_path = _default_path(file_path, engine)
+    if engine == "sqlite":
+        return TaskDatabase(file_path).delete_where(predicate)
+    with _locked_for(tasks, file_path):
+        tasks = _synced_or_load(tasks, file_path, engine)
+        deleted = tasks.remove_where(predicate)
+        if not deleted:
+            return deleted
+        if _deferred(tasks, file_path, [task["id"] for task in deleted]):
+            return deleted
+        if engine == "journal":
+            _append_journal(file_path, [{"op": "delete", "id": task["id"]} for task in deleted])
+            tasks.signature = store_signature(file_path, engine)
+        else:
+            save_tasks(tasks, file_path, engine)
+        return deleted
+
+def update_task(task_id, fields, file_path=None, engine=None, tasks=None):
+    """
+    Update fields of a single stored task.
+    
+    The journal and sqlite engines write only this record; the json engine
+    still has to rewrite the whole file.
+    
+    Args:
+        task_id (int): ID of the task to update
+        fields (dict): Fields to merge into the task ("id" is ignored)
+        file_path (str): Path of the task store
+        engine (str): Storage engine (default DEFAULT_STORAGE_ENGINE)
+        tasks (TaskList): In-memory copy of the store, changed in place instead
+            of re-reading the file while it is in sync (see is_stale)
+        
+    Returns:
+        dict: The updated task, or None if no task has that ID
+    """
+    return _change_task(task_id, lambda task: fields, file_path, engine, tasks)
+
+def toggle_completed(task_id, file_path=None, engine=None, tasks=None):
+    """
+    Flip the completed flag of a single stored task.
+    
+    Args:
+        task_id (int): ID of the task to toggle
+        file_path (str): Path of the task store
+        engine (str): Storage engine (default DEFAULT_STORAGE_ENGINE)
+        tasks (TaskList): In-memory copy of the store, changed in place instead
+            of re-reading the file while it is in sync (see is_stale)
+        
+    Returns:
+        dict: The updated task, or None if no task has that ID
+    """
+    return _change_task(
+        task_id,
+        lambda task: {"completed": not task.get("completed", False)},
+        file_path,
+        engine,
+        tasks,
+    )
+
+def delete_task(task_id, file_path=None, engine=None, tasks=None):
+    """
+    Delete a single stored task.
+    
+    Args:
+        task_id (int): ID of the task to delete
+        file_path (str): Path of the task store
+        engine (str): Storage engine (default DEFAULT_STORAGE_ENGINE)
+        tasks (TaskList): In-memory copy of the store, changed in place instead
+            of re-reading the file while it is in sync (see is_stale)
+        
+    Returns:
+        dict: The deleted task, or None if no task has that ID
+    """
+    engine = _resolve_engine(engine)
+    file_path = _default_path(file_path, engine)
+    if engine == "sqlite":
+        db = TaskDatabase(file_path)
+        task = db.get(task_id)
+        if task is not None:
+            db.delete(task_id)
+        return task
+    with _locked_for(tasks, file_path):
+        tasks = _synced_or_load(tasks, file_path, engine)
+        task = tasks.remove_by_id(task_id)
+        if task is None:
+            return None
+        if not append_task_change("delete", {"id": task_id}, file_path, engine, tasks):
+            save_tasks(tasks, file_path, engine)
+        return task
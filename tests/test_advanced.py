@@ -349,15 +349,20 @@ def test_display_tasks(monkeypatch):
 def test_complete_and_delete(tmp_path, monkeypatch):
     fp = tmp_path / "tasks.json"
     tasks_module.save_tasks([{"id":5,"completed":False}], file_path=str(fp))
-    # Stub app_module load/save to use our tmp file
-    monkeypatch.setattr(app_module, "load_tasks", lambda: tasks_module.load_tasks(file_path=str(fp)))
-    monkeypatch.setattr(app_module, "save_tasks", lambda tasks_list: tasks_module.save_tasks(tasks_list, file_path=str(fp)))
+    # Point the storage layer at our tmp file
+    monkeypatch.setattr(tasks_module, "DEFAULT_TASKS_FILE", str(fp))
+    class SS5: pass
+    state = SS5(); state.tasks = [{"id":5,"completed":False}]
+    monkeypatch.setattr(app_module.st, "session_state", state)
     app_module.complete_task(5)
     loaded = tasks_module.load_tasks(file_path=str(fp))
     assert loaded[0]["completed"] is True
+    # Session state is patched in place rather than reloaded
+    assert state.tasks == [{"id":5,"completed":True}]
     app_module.delete_task(5)
     loaded2 = tasks_module.load_tasks(file_path=str(fp))
     assert loaded2 == []
+    assert state.tasks == []
 
 # Additional tests to cover session_state init and edit flow
 # --- Additional tests for src/app.py coverage ---
@@ -428,9 +433,6 @@ def test_main_run_selected(monkeypatch):
     # Stub UI and logic components
     monkeypatch.setattr(app_module, "show_sidebar", lambda tasks: None)
     monkeypatch.setattr(app_module, "show_filters", lambda tasks: ("All","All",True))
-    monkeypatch.setattr(app_module, "filter_tasks_by_category", lambda tasks,cat: tasks)
-    monkeypatch.setattr(app_module, "filter_tasks_by_priority", lambda tasks,pri: tasks)
-    monkeypatch.setattr(app_module, "sort_tasks_by_due_date", lambda tasks,ascending: tasks)
     monkeypatch.setattr(app_module, "display_tasks", lambda tasks: None)
     # Prepare session_state
     class SS3: pass
@@ -463,4 +465,131 @@ def test_module_run_main(monkeypatch):
     called = []
     monkeypatch.setattr("src.app.main", lambda: called.append(True))
     runpy.run_module("src.app", run_name="__main__")
-    assert called
\ No newline at end of file
+    assert called
+ # With the journal engine, complete_task and delete_task append log records instead of rewriting
+def test_complete_and_delete_journal(tmp_path, monkeypatch):
+    fp = tmp_path / "tasks.json"
+    monkeypatch.setattr(tasks_module, "DEFAULT_TASKS_FILE", str(fp))
+    monkeypatch.setattr(tasks_module, "DEFAULT_STORAGE_ENGINE", "journal")
+    tasks_module.save_tasks([{"id":5,"completed":False},{"id":6,"completed":False}])
+    snapshot = fp.read_text()
+    app_module.complete_task(5)
+    app_module.delete_task(6)
+    assert fp.read_text() == snapshot
+    assert len((tmp_path / "tasks.json.log").read_text().splitlines()) == 2
+    assert tasks_module.load_tasks() == [{"id":5,"completed":True}]
+
+ # With the sqlite engine, main() renders from one indexed query instead of loading every task
+def test_main_queries_sqlite(tmp_path, monkeypatch):
+    db = tasks_module.open_task_db(str(tmp_path / "tasks.db"))
+    db.replace_all([
+        {"id":1,"title":"A","description":"","priority":"High","category":"Work","due_date":"2099-01-01","completed":False},
+        {"id":2,"title":"B","description":"","priority":"Low","category":"Home","due_date":"2099-01-01","completed":False},
+    ])
+    class SS4: pass
+    ss = SS4(); ss.tasks = db
+    monkeypatch.setattr(app_module.st, "session_state", ss)
+    monkeypatch.setattr(app_module, "load_tasks", lambda: pytest.fail("load_tasks called"))
+    monkeypatch.setattr(app_module, "show_sidebar", lambda tasks: None)
+    monkeypatch.setattr(app_module, "show_filters", lambda tasks: ("Work","All",False))
+    monkeypatch.setattr(app_module.st, "title", lambda *a,**k: None)
+    monkeypatch.setattr(app_module.st, "header", lambda *a,**k: None)
+    monkeypatch.setattr(app_module.st, "markdown", lambda *a,**k: None)
+    monkeypatch.setattr(app_module.st, "selectbox", lambda *a,**k: "Ascending")
+    monkeypatch.setattr(app_module.st, "expander", lambda *a,**k: DummyCM())
+    monkeypatch.setattr(app_module.st, "write", lambda *a,**k: None)
+    monkeypatch.setattr(app_module.st, "subheader", lambda *a,**k: None)
+    monkeypatch.setattr(app_module.st, "button", lambda *a,**k: False)
+    monkeypatch.setattr(app_module.st, "columns", lambda *a,**k: (DummyCM(),)*6)
+    monkeypatch.setattr(app_module.st, "checkbox", lambda *a,**k: False)
+    rendered = []
+    monkeypatch.setattr(app_module, "render_task", lambda t, overdue=False: rendered.append(t["id"]))
+    app_module.main()
+    assert rendered == [1]
+
+ # paginate_sections slices one page across the overdue/today/upcoming sections
+def test_paginate_sections():
+    sections = [("Overdue", [1, 2, 3]), ("Today", []), ("Upcoming", [4, 5, 6, 7])]
+    assert app_module.paginate_sections(sections, 1, 2) == [("Overdue", [1, 2])]
+    assert app_module.paginate_sections(sections, 2, 2) == [("Overdue", [3]), ("Upcoming", [4])]
+    assert app_module.paginate_sections(sections, 4, 2) == [("Upcoming", [7])]
+    assert app_module.paginate_sections(sections, 5, 2) == []
+
+ # Table mode saves every edited row through one apply_task_changes call
+def test_apply_table_edits(tmp_path, monkeypatch):
+    fp = tmp_path / "tasks.json"
+    monkeypatch.setattr(tasks_module, "DEFAULT_TASKS_FILE", str(fp))
+    tasks_module.save_tasks([{"id":5,"completed":False,"title":"A"},{"id":6,"completed":False,"title":"B"}])
+    class SS6:
+        def __getitem__(self, key): return getattr(self, key)
+    state = SS6(); state.tasks = tasks_module.load_tasks()
+    state.task_table = {"edited_rows": {"0": {"completed": True}, 1: {"title": "C"}}}
+    monkeypatch.setattr(app_module.st, "session_state", state)
+    calls = []
+    real_apply = app_module.apply_task_changes
+    monkeypatch.setattr(app_module, "apply_task_changes", lambda changes, **kw: calls.append(changes) or real_apply(changes, **kw))
+    assert app_module.apply_table_edits("task_table", [5, 6]) == {5: {"completed": True}, 6: {"title": "C"}}
+    assert len(calls) == 1
+    expected = [{"id":5,"completed":True,"title":"A"},{"id":6,"completed":False,"title":"C"}]
+    assert tasks_module.load_tasks() == expected
+    assert state.tasks == expected
+
+ # Table rows that fail validation are reported and skipped; picked dates are saved as YYYY-MM-DD
+def test_apply_table_edits_validates_rows(tmp_path, monkeypatch):
+    fp = tmp_path / "tasks.json"
+    monkeypatch.setattr(tasks_module, "DEFAULT_TASKS_FILE", str(fp))
+    tasks_module.save_tasks([{"id":i,"completed":False,"title":"A","due_date":"2025-01-05"} for i in (1, 2, 3)])
+    class SS8:
+        def __getitem__(self, key): return getattr(self, key)
+    state = SS8(); state.tasks = tasks_module.load_tasks()
+    state.task_table = {"edited_rows": {"0": {"due_date": None, "title": "X"}, "1": {"category": None},
+                                        "2": {"due_date": date(2025, 2, 1)}}}
+    monkeypatch.setattr(app_module.st, "session_state", state)
+    errors = []
+    monkeypatch.setattr(app_module.st, "error", errors.append)
+    assert app_module.apply_table_edits("task_table", [1, 2, 3]) == {
+        1: {"due_date": "", "title": "X"}, 2: {"category": "Other"}, 3: {"due_date": "2025-02-01"}
+    }
+    assert errors == []
+    state.task_table = {"edited_rows": {"0": {"due_date": "2025-1-5"}, "1": {"title": " "}}}
+    assert app_module.apply_table_edits("task_table", [1, 2, 3]) == {}
+    assert len(errors) == 2 and errors[0].startswith("Row 1 not saved")
+    assert [t["due_date"] for t in tasks_module.load_tasks()] == ["", "2025-01-05", "2025-02-01"]
+
+ # Bulk actions persist once and update the session list in place
+def test_bulk_actions(tmp_path, monkeypatch):
+    fp = tmp_path / "tasks.json"
+    monkeypatch.setattr(tasks_module, "DEFAULT_TASKS_FILE", str(fp))
+    tasks_module.save_tasks([{"id":i,"completed":False,"priority":"Low"} for i in (1, 2, 3)])
+    class SS7: pass
+    state = SS7(); state.tasks = tasks_module.load_tasks()
+    monkeypatch.setattr(app_module.st, "session_state", state)
+    app_module.bulk_update_tasks([1, 2], {"completed": True})
+    app_module.bulk_update_tasks([3], {"priority": "High"})
+    assert [t["completed"] for t in state.tasks] == [True, True, False]
+    app_module.bulk_delete_tasks([1])
+    app_module.clear_completed_tasks()
+    expected = [{"id":3,"completed":False,"priority":"High"}]
+    assert state.tasks == expected
+    assert tasks_module.load_tasks() == expected
+
+ # A session list loaded from disk is changed in place; disk is re-read only after an outside write
+def test_session_write_through(tmp_path, monkeypatch):
+    fp = tmp_path / "tasks.json"
+    monkeypatch.setattr(tasks_module, "DEFAULT_TASKS_FILE", str(fp))
+    tasks_module.save_tasks([{"id":5,"completed":False},{"id":6,"completed":False}])
+    class SS8: pass
+    state = SS8(); state.tasks = tasks_module.load_tasks()
+    session = state.tasks
+    monkeypatch.setattr(app_module.st, "session_state", state)
+    real_load = tasks_module.load_tasks
+    monkeypatch.setattr(tasks_module, "load_tasks", lambda *a, **k: pytest.fail("store re-read"))
+    app_module.complete_task(5)
+    app_module.delete_task(6)
+    assert state.tasks is session and session == [{"id":5,"completed":True}]
+    assert not tasks_module.is_stale(session)
+    assert real_load() == [{"id":5,"completed":True}]
+    fp.write_text("[]")
+    assert tasks_module.is_stale(session)
+    monkeypatch.setattr(tasks_module, "load_tasks", real_load)
+    assert app_module.toggle_completed(5, tasks=session) is None
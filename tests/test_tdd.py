@@ -1,6 +1,23 @@
 import pytest
 from datetime import datetime, timedelta
-from src.tasks import edit_task, sort_tasks_by_due_date, get_overdue_tasks, get_upcoming_tasks
+from src.tasks import (
+    edit_task, sort_tasks_by_due_date, get_overdue_tasks, get_upcoming_tasks,
+    load_tasks, save_tasks, append_task_change, compact_journal,
+    open_task_db, migrate_json_to_sqlite, filter_tasks_by_priority,
+    filter_tasks_by_category, filter_tasks_by_completion,
+    update_task, toggle_completed, delete_task, TaskList, find_task,
+    generate_unique_id, allocate_ids, import_tasks, export_tasks,
+    iter_tasks, search_tasks, BINARY_MAGIC, get_task_view, get_categories,
+    get_tasks_due_between, get_tasks_due_within, partition_by_due, is_task_overdue,
+    apply_task_changes, bulk_update, bulk_delete, bulk_delete_where, TaskStore,
+    TaskConflictError, Task, TaskTable, TaskColumns, get_task_counts, get_completion_history,
+    TaskQuery, next_due,
+)
+import json
+import threading
+import time
+import multiprocessing
+import src.tasks as tasks_module
 
  # Sample tasks fixture: creates tasks for overdue, today, and upcoming dates
 @pytest.fixture
@@ -79,4 +96,870 @@ def test_get_upcoming_tasks(sample_tasks):
     upcoming = get_upcoming_tasks(sample_tasks.copy())
     today_str = datetime.now().date().strftime("%Y-%m-%d")
     assert all(t["due_date"] >= today_str for t in upcoming)
-    assert {t["id"] for t in upcoming} == {2, 3}
\ No newline at end of file
+    assert {t["id"] for t in upcoming} == {2, 3}
+
+
+ # Journal engine: each change is one appended line and load replays snapshot + log
+def test_journal_appends_and_replays(tmp_path, sample_tasks):
+    fp = str(tmp_path / "tasks.json")
+    save_tasks(sample_tasks[:2], file_path=fp, engine="journal")
+    snapshot = (tmp_path / "tasks.json").read_text()
+    assert append_task_change("add", sample_tasks[2], file_path=fp, engine="journal")
+    assert append_task_change("update", {"id": 1, "completed": True}, file_path=fp, engine="journal")
+    assert append_task_change("delete", {"id": 2}, file_path=fp, engine="journal")
+    # Snapshot untouched, three records in the log
+    assert (tmp_path / "tasks.json").read_text() == snapshot
+    assert len((tmp_path / "tasks.json.log").read_text().splitlines()) == 3
+    tasks = load_tasks(file_path=fp, engine="journal")
+    assert [t["id"] for t in tasks] == [1, 3]
+    assert tasks[0]["completed"] is True
+
+ # Journal engine: a truncated last record is ignored and compaction folds the log away
+def test_journal_partial_line_and_compaction(tmp_path, sample_tasks):
+    fp = str(tmp_path / "tasks.json")
+    save_tasks(sample_tasks, file_path=fp, engine="journal")
+    append_task_change("delete", {"id": 1}, file_path=fp, engine="journal")
+    with open(fp + ".log", "a") as f:
+        f.write('{"op": "delete", "id"')
+    assert [t["id"] for t in load_tasks(file_path=fp, engine="journal")] == [2, 3]
+    compact_journal(fp)
+    assert not (tmp_path / "tasks.json.log").exists()
+    assert [t["id"] for t in load_tasks(file_path=fp)] == [2, 3]
+
+ # Journal engine: the log compacts automatically once it outgrows the snapshot
+def test_journal_auto_compacts(tmp_path, sample_tasks, monkeypatch):
+    monkeypatch.setattr(tasks_module, "JOURNAL_COMPACT_BYTES", 0)
+    fp = str(tmp_path / "tasks.json")
+    save_tasks([], file_path=fp, engine="journal")
+    append_task_change("add", sample_tasks[0], file_path=fp, engine="journal")
+    assert not (tmp_path / "tasks.json.log").exists()
+    assert load_tasks(file_path=fp) == [sample_tasks[0]]
+
+ # The default json engine does not persist incremental changes
+def test_append_task_change_json_engine_falls_back(tmp_path):
+    fp = str(tmp_path / "tasks.json")
+    assert append_task_change("delete", {"id": 1}, file_path=fp) is False
+    assert not (tmp_path / "tasks.json.log").exists()
+
+ # SQLite engine: save/load round-trip and single-row changes
+def test_sqlite_round_trip_and_changes(tmp_path, sample_tasks):
+    db = str(tmp_path / "tasks.db")
+    save_tasks(sample_tasks, file_path=db, engine="sqlite")
+    assert load_tasks(file_path=db, engine="sqlite") == sample_tasks
+    append_task_change("update", {"id": 2, "completed": True}, file_path=db, engine="sqlite")
+    append_task_change("delete", {"id": 3}, file_path=db, engine="sqlite")
+    tasks = load_tasks(file_path=db, engine="sqlite")
+    assert [t["id"] for t in tasks] == [1, 2]
+    assert tasks[1]["completed"] is True
+
+ # SQLite engine: filter helpers run as indexed queries on a TaskDatabase
+def test_sqlite_filters_use_indexes(tmp_path, sample_tasks):
+    db = open_task_db(str(tmp_path / "tasks.db"))
+    db.replace_all(sample_tasks)
+    assert [t["id"] for t in filter_tasks_by_priority(db, "High")] == [3]
+    assert [t["id"] for t in filter_tasks_by_category(db, "Personal")] == [2]
+    assert [t["id"] for t in filter_tasks_by_completion(db, False)] == [1, 2, 3]
+    assert [t["id"] for t in get_overdue_tasks(db)] == [1]
+    assert [t["id"] for t in sort_tasks_by_due_date(db, ascending=False)] == [3, 2, 1]
+    with db._connect() as conn:
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT data FROM tasks WHERE priority = ?", ("High",)
+        ).fetchall()
+    assert any("idx_tasks_priority" in row[-1] for row in plan)
+
+ # SQLite engine: one-shot migration copies tasks.json, including its journal
+def test_migrate_json_to_sqlite(tmp_path, sample_tasks):
+    fp = str(tmp_path / "tasks.json")
+    db = str(tmp_path / "tasks.db")
+    save_tasks(sample_tasks, file_path=fp)
+    append_task_change("delete", {"id": 1}, file_path=fp, engine="journal")
+    assert migrate_json_to_sqlite(fp, db) == 2
+    assert [t["id"] for t in open_task_db(db)] == [2, 3]
+
+ # Row-level mutations return the changed record and write only that record
+@pytest.mark.parametrize("engine", ["json", "journal", "sqlite"])
+def test_row_level_mutations(tmp_path, sample_tasks, engine):
+    fp = str(tmp_path / "tasks.store")
+    save_tasks(sample_tasks, file_path=fp, engine=engine)
+    updated = update_task(1, {"title": "Renamed", "id": 99}, file_path=fp, engine=engine)
+    assert updated["id"] == 1 and updated["title"] == "Renamed"
+    assert toggle_completed(2, file_path=fp, engine=engine)["completed"] is True
+    assert delete_task(3, file_path=fp, engine=engine)["id"] == 3
+    assert update_task(42, {"title": "x"}, file_path=fp, engine=engine) is None
+    assert delete_task(42, file_path=fp, engine=engine) is None
+    tasks = load_tasks(file_path=fp, engine=engine)
+    assert [(t["id"], t["title"], t["completed"]) for t in tasks] == [
+        (1, "Renamed", False), (2, "Today Task", True)
+    ]
+
+ # TaskList keeps its id index consistent through list and by-id mutations
+def test_task_list_id_index(sample_tasks):
+    tasks = TaskList(sample_tasks[:2])
+    assert tasks == sample_tasks[:2]
+    assert tasks.get(2) is sample_tasks[1]
+    tasks.append(sample_tasks[2])
+    assert find_task(tasks, 3) is sample_tasks[2]
+    assert tasks.update_by_id(3, {"title": "Renamed", "id": 7})["title"] == "Renamed"
+    assert tasks.get(7) is None and tasks[2]["id"] == 3
+    assert tasks.remove_by_id(1)["id"] == 1
+    assert [t["id"] for t in tasks] == [2, 3] and tasks.get(1) is None
+    tasks.pop()
+    del tasks[0]
+    assert tasks.get(2) is None and tasks.get(3) is None
+    tasks.extend(sample_tasks)
+    tasks[0:1] = []
+    assert [t["id"] for t in tasks] == [2, 3] and tasks.get(1) is None
+    assert tasks.remove_by_id(42) is None
+
+ # edit_task on a TaskList updates the task in place instead of rebuilding the list
+def test_edit_task_on_task_list(sample_tasks):
+    tasks = TaskList(sample_tasks)
+    result = edit_task(tasks, 2, {"title": "Edited"})
+    assert result is tasks
+    assert [t["id"] for t in tasks] == [1, 2, 3]
+    assert tasks.get(2)["title"] == "Edited"
+
+ # load_tasks returns a TaskList that can be used as a plain list
+def test_load_tasks_returns_task_list(tmp_path, sample_tasks):
+    fp = str(tmp_path / "tasks.json")
+    save_tasks(sample_tasks, file_path=fp)
+    tasks = load_tasks(file_path=fp)
+    assert isinstance(tasks, TaskList) and tasks == sample_tasks
+    assert tasks.get(3)["title"] == "New Task"
+
+ # IDs come from a persisted counter: O(1) on a TaskList and never reused after a delete
+@pytest.mark.parametrize("engine", ["json", "journal", "sqlite"])
+def test_ids_not_reused_after_delete(tmp_path, sample_tasks, engine):
+    fp = str(tmp_path / "tasks.store")
+    save_tasks(sample_tasks, file_path=fp, engine=engine)
+    delete_task(3, file_path=fp, engine=engine)
+    tasks = load_tasks(file_path=fp, engine=engine)
+    assert generate_unique_id(tasks) == 4
+    assert allocate_ids(3, file_path=fp, engine=engine) == range(4, 7)
+    assert allocate_ids(1, file_path=fp, engine=engine) == range(7, 8)
+    assert load_tasks(file_path=fp, engine=engine).next_id == 8
+
+ # TaskList.next_id tracks appends and survives removals
+def test_task_list_next_id(sample_tasks):
+    tasks = TaskList()
+    assert generate_unique_id(tasks) == 1
+    tasks.extend(sample_tasks)
+    tasks.remove_by_id(3)
+    tasks.clear()
+    assert generate_unique_id(tasks) == 4
+
+ # allocate_ids derives the counter once for stores written before it existed
+def test_allocate_ids_without_meta(tmp_path):
+    fp = tmp_path / "tasks.json"
+    fp.write_text('[{"id": 9}]')
+    assert allocate_ids(2, file_path=str(fp)) == range(10, 12)
+
+ # Copies loaded before each other's writes still get distinct ids, and sqlite refuses to overwrite a taken id
+@pytest.mark.parametrize("engine", ["json", "journal", "sqlite"])
+def test_reserve_task_id_across_stale_copies(tmp_path, sample_tasks, engine):
+    fp = str(tmp_path / "tasks.store")
+    save_tasks(sample_tasks, file_path=fp, engine=engine)
+    first, second = load_tasks(file_path=fp, engine=engine), load_tasks(file_path=fp, engine=engine)
+    assert [tasks_module.reserve_task_id(copy, fp, engine) for copy in (first, second)] == [4, 5]
+    assert first.next_id == 5
+    if engine == "sqlite":
+        db = open_task_db(fp)
+        with pytest.raises(TaskConflictError):
+            db.insert(dict(sample_tasks[0], title="Clash"))
+        assert db.get(1)["title"] == "Old Task"
+
+ # Bulk export/import round-trips through JSON Lines and CSV with fresh ids
+@pytest.mark.parametrize("engine", ["json", "journal", "sqlite"])
+@pytest.mark.parametrize("ext", ["jsonl", "csv"])
+def test_export_then_import(tmp_path, sample_tasks, engine, ext):
+    src = str(tmp_path / "src.store")
+    dst = str(tmp_path / "dst.store")
+    dump = str(tmp_path / f"dump.{ext}")
+    save_tasks(sample_tasks, file_path=src, engine=engine)
+    assert export_tasks(dump, file_path=src, engine=engine) == 3
+    save_tasks([sample_tasks[0]], file_path=dst, engine=engine)
+    assert import_tasks(dump, file_path=dst, engine=engine, chunk_size=2) == 3
+    tasks = load_tasks(file_path=dst, engine=engine)
+    assert [t["id"] for t in tasks] == [1, 2, 3, 4]
+    assert [t["title"] for t in tasks[1:]] == [t["title"] for t in sample_tasks]
+    assert all(t["completed"] is False for t in tasks)
+
+ # An invalid record aborts the import without committing anything
+@pytest.mark.parametrize("engine", ["json", "journal", "sqlite"])
+def test_import_rejects_invalid_records(tmp_path, engine):
+    fp = str(tmp_path / "tasks.store")
+    dump = tmp_path / "dump.jsonl"
+    dump.write_text('{"title": "ok", "due_date": "2025-01-01"}\n{"title": "bad", "priority": "Urgent"}\n')
+    with pytest.raises(ValueError, match="Record 2: invalid priority"):
+        import_tasks(str(dump), file_path=fp, engine=engine, chunk_size=1)
+    assert load_tasks(file_path=fp, engine=engine) == []
+    with pytest.raises(ValueError):
+        import_tasks(str(tmp_path / "dump.txt"), file_path=fp, engine=engine)
+
+ # Records with a non-string category, a non-canonical date or a wrongly typed field are rejected by number
+@pytest.mark.parametrize("record", [
+    '{"title": "bad", "category": ["Work"]}',
+    '{"title": "bad", "due_date": "2025-1-5"}',
+    '{"title": "bad", "due_date": 20250105}',
+    '["bad"]',
+])
+def test_import_rejects_malformed_fields(tmp_path, record):
+    dump = tmp_path / "dump.jsonl"
+    dump.write_text('{"title": "ok", "due_date": "2025-01-05"}\n' + record + "\n")
+    with pytest.raises(ValueError, match="Record 2: "):
+        import_tasks(str(dump), file_path=str(tmp_path / "tasks.json"))
+
+ # iter_tasks parses the array incrementally, even with items split across chunks
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_iter_tasks_streams_items(tmp_path, sample_tasks, chunk_size):
+    fp = str(tmp_path / "tasks.json")
+    save_tasks(sample_tasks, file_path=fp)
+    assert list(iter_tasks(fp, chunk_size=chunk_size)) == sample_tasks
+    (tmp_path / "compact.json").write_text(json.dumps([{"id": 12}, {"id": 345}]))
+    assert list(iter_tasks(str(tmp_path / "compact.json"), chunk_size=chunk_size)) == [{"id": 12}, {"id": 345}]
+    assert list(iter_tasks(str(tmp_path / "missing.json"))) == []
+
+ # iter_tasks reports truncated or malformed files instead of stopping silently
+@pytest.mark.parametrize("text", ["", "{}", '[{"id": 1}', '[{"id": 1}, {"id"'])
+def test_iter_tasks_rejects_bad_json(tmp_path, text):
+    fp = tmp_path / "tasks.json"
+    fp.write_text(text)
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_tasks(str(fp), chunk_size=4))
+
+ # Filter helpers accept any iterable, so they run as a streaming pipeline
+def test_filters_accept_iterators(tmp_path, sample_tasks):
+    fp = str(tmp_path / "tasks.json")
+    save_tasks(sample_tasks, file_path=fp)
+    assert [t["id"] for t in filter_tasks_by_priority(iter_tasks(fp), "High")] == [3]
+    assert [t["id"] for t in search_tasks(iter_tasks(fp), "today")] == [2]
+    assert [t["id"] for t in get_overdue_tasks(iter_tasks(fp))] == [1]
+
+ # Every on-disk format round-trips, including mixed value types, and is detected on load
+@pytest.mark.parametrize("fmt", ["pretty", "compact", "binary"])
+def test_file_formats_round_trip(tmp_path, sample_tasks, fmt):
+    fp = str(tmp_path / "tasks.json")
+    odd = [
+        {"id": 10, "title": "ünïcode ✓", "completed": None, "score": 1.5, "tags": ["a", {"b": 2}]},
+        {"id": 11, "priority": 3, "due_date": "2025-01-01"},
+        {},
+    ]
+    save_tasks(sample_tasks + odd, file_path=fp, format=fmt)
+    assert load_tasks(file_path=fp) == sample_tasks + odd
+    assert list(iter_tasks(fp)) == sample_tasks + odd
+    assert ((tmp_path / "tasks.json").read_bytes()[:4] == BINARY_MAGIC) == (fmt == "binary")
+
+ # Compact and binary files are smaller than the indented default
+def test_file_formats_sizes(tmp_path, sample_tasks):
+    sizes = {}
+    for fmt in ["pretty", "compact", "binary"]:
+        fp = tmp_path / f"tasks.{fmt}"
+        save_tasks(sample_tasks * 50, file_path=str(fp), format=fmt)
+        sizes[fmt] = fp.stat().st_size
+    assert sizes["binary"] < sizes["compact"] < sizes["pretty"]
+
+ # Binary files stream segment by segment through iter_tasks
+def test_binary_segments_stream(tmp_path, sample_tasks, monkeypatch):
+    monkeypatch.setattr(tasks_module, "BINARY_SEGMENT_ROWS", 2)
+    fp = str(tmp_path / "tasks.bin")
+    many = [dict(t, id=i) for i, t in enumerate(sample_tasks * 3, 1)]
+    save_tasks(many, file_path=fp, format="binary")
+    stream = iter_tasks(fp)
+    assert next(stream) == many[0]
+    assert [t["id"] for t in stream] == list(range(2, 10))
+
+ # A truncated binary file is reported like corrupted JSON and left in place
+def test_truncated_binary_file(tmp_path, sample_tasks, capsys):
+    fp = tmp_path / "tasks.bin"
+    save_tasks(sample_tasks, file_path=str(fp), format="binary")
+    fp.write_bytes(fp.read_bytes()[:-10])
+    truncated = fp.read_bytes()
+    assert load_tasks(file_path=str(fp)) == []
+    assert "invalid task data" in capsys.readouterr().out
+    assert fp.read_bytes() == truncated
+    assert (tmp_path / "tasks.bin.corrupt").read_bytes() == truncated
+
+ # get_task_view memoizes on a TaskList and recomputes after a mutation
+def test_get_task_view_cached_until_mutation(sample_tasks):
+    tasks = TaskList(sample_tasks)
+    view = get_task_view(tasks, show_completed=True)
+    assert [t["id"] for t in view.overdue] == [1]
+    assert [t["id"] for t in view.filtered] == [1, 2, 3]
+    assert get_task_view(tasks, show_completed=True) is view
+    assert get_task_view(tasks) is not view
+    tasks.update_by_id(1, {"completed": True})
+    fresh = get_task_view(tasks, show_completed=True)
+    assert fresh is not view and fresh.overdue == ()
+    assert get_categories(tasks) == ["Other", "Personal", "Work"]
+    tasks.append({**sample_tasks[0], "id": 9, "category": "Home"})
+    assert get_categories(tasks) == ["Home", "Other", "Personal", "Work"]
+
+ # TaskList.query intersects the field indexes and follows every mutation
+def test_tasklist_query_uses_field_indexes(sample_tasks):
+    tasks = TaskList(sample_tasks)
+    assert [t["id"] for t in tasks.query(completed=False)] == [1, 2, 3]
+    assert [t["id"] for t in tasks.query(category="Work", priority="Low")] == [1]
+    assert tasks.query(category="Work", priority="High") == []
+    tasks.update_by_id(1, {"priority": "High", "completed": True})
+    assert tasks.query(category="Work", priority="Low") == []
+    assert [t["id"] for t in filter_tasks_by_completion(tasks, True)] == [1]
+    tasks.remove_by_id(3)
+    tasks.append({**sample_tasks[1], "id": 7})
+    assert [t["id"] for t in filter_tasks_by_category(tasks, "Personal")] == [2, 7]
+    assert filter_tasks_by_priority(tasks, "High") == [tasks.get(1)]
+    assert tasks._by_field == TaskList(list(tasks))._by_field
+
+ # TaskList.search ranks prefix matches and follows edits and deletes
+def test_tasklist_search_inverted_index(sample_tasks):
+    tasks = TaskList(sample_tasks)
+    tasks.append({**sample_tasks[2], "id": 4, "title": "Desk", "description": "task desc"})
+    assert [t["id"] for t in search_tasks(tasks, "desc")] == [4, 1, 2, 3]
+    assert [t["id"] for t in search_tasks(tasks, "desc1")] == [1]
+    assert [t["id"] for t in search_tasks(tasks, "des")] == [4, 1, 2, 3]
+    assert [t["id"] for t in search_tasks(tasks, "TASK d")] == [4]
+    assert search_tasks(tasks, "zzz") == []
+    tasks.update_by_id(2, {"title": "Renamed"})
+    assert [t["id"] for t in search_tasks(tasks, "ren")] == [2]
+    tasks.remove_by_id(4)
+    assert [t["id"] for t in search_tasks(tasks, "desk")] == []
+    view = get_task_view(tasks, search="new")
+    assert [t["id"] for t in view.filtered] == [3]
+    tasks.append({**sample_tasks[0], "id": 5, "title": "Ask first"})
+    assert [t["id"] for t in search_tasks(tasks, "ask")] == [5, 1, 3]
+
+ # TaskList.search finds exactly the substring matches of a plain list, with prefix matches ranked first
+@pytest.mark.parametrize("query", ["ask", "ASK", "task", "ld ta", "esc2", "-", "", "d t", "sk 1", "1 ", "zzz"])
+def test_tasklist_search_matches_plain_list(sample_tasks, query):
+    sample_tasks.append({**sample_tasks[0], "id": 4, "title": "Ask-me", "description": "Old-task 1"})
+    expected = search_tasks(list(sample_tasks), query)
+    found = search_tasks(TaskList(sample_tasks), query)
+    assert sorted(t["id"] for t in found) == [t["id"] for t in expected]
+
+ # Postings, the scan for broad or short words and the trigram-indexed vocabulary rank alike
+@pytest.mark.parametrize("query", ["task", "ta", "sk", "ask", "desc 1", "desc2", "ld task", "zzz"])
+def test_tasklist_search_scan_and_postings_agree(sample_tasks, query):
+    rows = [dict(sample_tasks[i % 3], id=i, description=f"Desc{i % 7} item{i}") for i in range(1, 60)]
+    tasks = TaskList(rows)
+    terms = set(query.split())
+
+    def score(task):
+        weights = tasks_module._token_weights(task)
+        return sum(w * (2 if word == term else 1) for word, w in weights.items() for term in terms if word.startswith(term))
+
+    expected = sorted(search_tasks(rows, query), key=lambda t: (-score(t), t["id"]))
+    assert search_tasks(tasks, query) == expected
+    tasks.update_by_id(1, {"title": "Renamed"})
+    tasks.remove_by_id(2)
+    tasks[:] = list(tasks)
+    fresh = TaskList(list(tasks))
+    fresh._build_postings()
+    assert tasks._postings == fresh._postings
+    assert (tasks._vocabulary, tasks._trigrams) == (fresh._vocabulary, fresh._trigrams)
+
+ # The due-date index answers overdue, upcoming and date windows in due order
+def test_tasklist_due_date_index(sample_tasks):
+    tasks = TaskList(reversed(sample_tasks))
+    assert [t["id"] for t in sort_tasks_by_due_date(tasks)] == [1, 2, 3]
+    assert [t["id"] for t in sort_tasks_by_due_date(tasks, ascending=False)] == [3, 2, 1]
+    assert [t["id"] for t in get_overdue_tasks(tasks)] == [1]
+    assert [t["id"] for t in get_upcoming_tasks(tasks)] == [2, 3]
+    assert [t["id"] for t in get_tasks_due_within(tasks, 0)] == [2]
+    assert [t["id"] for t in get_tasks_due_within(tasks, 1)] == [2, 3]
+    start, end = sample_tasks[0]["due_date"], sample_tasks[1]["due_date"]
+    assert [t["id"] for t in get_tasks_due_between(tasks, start, end)] == [1, 2]
+    assert get_tasks_due_between(list(sample_tasks), start, end) == sample_tasks[:2]
+    # A plain list sorts stably on the due date alone, whatever its ids are
+    same_day = [dict(sample_tasks[1], id=task_id) for task_id in ("b", "a", None, 1)]
+    assert sort_tasks_by_due_date(same_day, ascending=False) == same_day
+    assert get_tasks_due_between(same_day, end, end) == same_day
+    tasks.update_by_id(3, {"due_date": "2000-01-01"})
+    tasks.update_by_id(1, {"completed": True})
+    assert [t["id"] for t in get_overdue_tasks(tasks)] == [3]
+    assert [t["id"] for t in tasks.query(priority="High", due_before=end, order_by_due=True)] == [3]
+    tasks.remove_by_id(3)
+    assert tasks._by_due == TaskList(list(tasks))._by_due
+
+ # Tasks with a null due date or an unhashable category load, index and update like any other
+def test_tasklist_null_due_date(tmp_path, sample_tasks):
+    fp = tmp_path / "tasks.json"
+    sample_tasks[0]["due_date"] = None
+    sample_tasks[2]["category"] = ["Work", "Home"]
+    fp.write_text(json.dumps(sample_tasks))
+    tasks = load_tasks(str(fp))
+    assert [t["id"] for t in sort_tasks_by_due_date(tasks)] == [1, 2, 3]
+    assert [t["id"] for t in get_overdue_tasks(tasks)] == [1]
+    assert get_overdue_tasks(sample_tasks) == get_overdue_tasks(tasks)
+    assert [t["id"] for t in next_due(tasks, 1)] == [1]
+    tasks.update_by_id(2, {"due_date": None})
+    tasks.update_by_id(1, {"due_date": sample_tasks[2]["due_date"]})
+    assert [t["id"] for t in tasks.query(due_before="0", order_by_due=True)] == [2]
+    assert tasks.query(category=["Work", "Home"]) == [tasks.get(3)]
+    assert tasks._by_due == TaskList(list(tasks))._by_due
+
+ # Tasks without an id are not indexed, so a TaskList holding any answers like a plain list
+def test_tasklist_tasks_without_id(sample_tasks):
+    loose = {k: v for k, v in sample_tasks[0].items() if k != "id"}
+    plain = [loose, *sample_tasks[1:]]
+    tasks = TaskList(plain)
+    assert sort_tasks_by_due_date(tasks) == sort_tasks_by_due_date(plain)
+    assert sort_tasks_by_due_date(tasks, ascending=False) == sort_tasks_by_due_date(plain, ascending=False)
+    assert get_overdue_tasks(tasks) == [loose]
+    assert filter_tasks_by_priority(tasks, "Low") == [loose]
+    assert search_tasks(tasks, "old") == [loose]
+    assert next_due(tasks, 1) == [loose]
+    assert get_task_counts(tasks) == get_task_counts(plain)
+    assert get_completion_history(tasks) == get_completion_history(plain)
+    assert get_task_view(tasks) == get_task_view(plain)
+
+ # Ids that are not integers are kept and found but do not take part in numbering
+def test_non_integer_ids(tmp_path, sample_tasks):
+    named = [dict(task, id=name) for task, name in zip(sample_tasks, "ab")]
+    tasks = TaskList(named + sample_tasks[2:])
+    assert tasks.next_id == 4 and tasks.get("a") is named[0]
+    tasks.append(dict(sample_tasks[0], id="c"))
+    assert tasks.next_id == 4 and tasks.get("c")["title"] == "Old Task"
+    assert generate_unique_id(named) == 1
+    fp = str(tmp_path / "tasks.json")
+    save_tasks(named, file_path=fp, engine="journal")
+    append_task_change("add", dict(sample_tasks[2], id="z"), file_path=fp, engine="journal")
+    loaded = load_tasks(file_path=fp, engine="journal")
+    assert [t["id"] for t in loaded] == ["a", "b", "z"] and loaded.next_id == 1
+
+ # partition_by_due reads the injected clock once and splits around that day
+def test_partition_by_due_with_injected_clock(sample_tasks):
+    calls = []
+    def clock():
+        calls.append(1)
+        return datetime(2030, 5, 2, 23, 59)
+    tasks = [
+        {"id": 1, "due_date": "2030-05-01", "completed": False},
+        {"id": 2, "due_date": "2030-05-02", "completed": True},
+        {"id": 3, "due_date": "2030-05-03", "completed": False},
+        {"id": 4, "due_date": "2030-04-01", "completed": True},
+    ]
+    overdue, due_today, upcoming = partition_by_due(tasks, today=clock)
+    assert calls == [1]
+    assert [t["id"] for t in overdue] == [1]
+    assert [t["id"] for t in due_today] == [2]
+    assert [t["id"] for t in upcoming] == [3, 4]
+    assert partition_by_due(tasks, today="2030-05-03").due_today == [tasks[2]]
+    assert is_task_overdue(tasks[2], today="2030-05-04")
+    assert [t["id"] for t in get_overdue_tasks(TaskList(tasks), today=clock)] == [1]
+    view = get_task_view(TaskList(tasks), show_completed=True, today="2030-05-02")
+    assert [t["id"] for t in view.due_today] == [2]
+
+ # apply_task_changes updates many tasks in one write on every engine
+@pytest.mark.parametrize("engine", ["json", "journal", "sqlite"])
+def test_apply_task_changes(tmp_path, sample_tasks, engine):
+    fp = str(tmp_path / "tasks.store")
+    save_tasks(sample_tasks, file_path=fp, engine=engine)
+    updated = apply_task_changes(
+        {1: {"completed": True}, 3: {"title": "Renamed", "id": 9}, 42: {"title": "x"}},
+        file_path=fp, engine=engine,
+    )
+    assert [(t["id"], t["completed"], t["title"]) for t in updated] == [
+        (1, True, "Old Task"), (3, False, "Renamed")
+    ]
+    assert apply_task_changes({42: {"title": "x"}}, file_path=fp, engine=engine) == []
+    tasks = load_tasks(file_path=fp, engine=engine)
+    assert [(t["id"], t["completed"], t["title"]) for t in tasks] == [
+        (1, True, "Old Task"), (2, False, "Today Task"), (3, False, "Renamed")
+    ]
+
+ # Bulk update and delete touch many tasks with one write on every engine
+@pytest.mark.parametrize("engine", ["json", "journal", "sqlite"])
+def test_bulk_operations(tmp_path, sample_tasks, engine):
+    fp = str(tmp_path / "tasks.store")
+    save_tasks(sample_tasks, file_path=fp, engine=engine)
+    assert [t["id"] for t in bulk_update([1, 2, 42], {"completed": True}, file_path=fp, engine=engine)] == [1, 2]
+    assert [t["id"] for t in bulk_delete_where(lambda t: t["completed"], file_path=fp, engine=engine)] == [1, 2]
+    assert bulk_delete_where(lambda t: t["completed"], file_path=fp, engine=engine) == []
+    save_tasks(sample_tasks, file_path=fp, engine=engine)
+    assert [t["id"] for t in bulk_delete([3, 1, 42], file_path=fp, engine=engine)] == [1, 3]
+    tasks = load_tasks(file_path=fp, engine=engine)
+    assert [t["id"] for t in tasks] == [2]
+    assert tasks.next_id == 4
+
+ # remove_where unindexes only the removed tasks, leaving the postings built by search in place
+def test_tasklist_remove_where(sample_tasks, monkeypatch):
+    tasks = TaskList(sample_tasks)
+    assert search_tasks(tasks, "task")
+    postings = tasks._postings
+    monkeypatch.setattr(TaskList, "_reindex", None)
+    assert [t["id"] for t in tasks.remove_where(lambda t: t["id"] != 2)] == [1, 3]
+    assert tasks._postings is postings and [t["id"] for t in search_tasks(tasks, "task")] == [2]
+    monkeypatch.undo()
+    fresh = TaskList(list(tasks))
+    assert [t["id"] for t in tasks] == [2] and tasks.next_id == 4
+    assert (tasks._by_id, tasks._by_field, tasks._by_due) == (fresh._by_id, fresh._by_field, fresh._by_due)
+
+ # TaskStore shares one list, serializes changes and versions every change and reload
+def test_task_store_shared_and_versioned(tmp_path, sample_tasks):
+    fp = str(tmp_path / "tasks.json")
+    save_tasks(sample_tasks, file_path=fp)
+    store = TaskStore(fp)
+    tasks = store.tasks
+    version = store.version
+    assert store.tasks is tasks and store.version == version
+    assert store.change(toggle_completed, 1)["completed"] is True
+    assert store.tasks is tasks and store.version != version
+    threads = [
+        threading.Thread(target=store.change, args=(update_task, i % 3 + 1, {"title": f"T{i}"}))
+        for i in range(12)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert load_tasks(file_path=fp) == store.tasks
+    save_tasks([], file_path=fp)
+    assert store.tasks == [] and store.tasks is not tasks
+
+ # A write-behind TaskStore coalesces changes into one background save and flushes on demand
+def test_task_store_write_behind(tmp_path, sample_tasks, monkeypatch):
+    fp = str(tmp_path / "tasks.json")
+    save_tasks(sample_tasks, file_path=fp)
+    saves = []
+    real_save = tasks_module.save_tasks
+    monkeypatch.setattr(tasks_module, "save_tasks", lambda *a, **kw: saves.append(1) or real_save(*a, **kw))
+    store = TaskStore(fp, flush_ms=60000)
+    for task_id in (1, 2, 3):
+        store.change(toggle_completed, task_id)
+    store.change(bulk_delete, [3])
+    assert store.dirty and saves == []
+    assert [t["completed"] for t in load_tasks(file_path=fp)] == [False, False, False]
+    store.flush()
+    assert not store.dirty and len(saves) == 1
+    assert load_tasks(file_path=fp) == store.tasks
+    store.change(update_task, 1, {"title": "Closed"})
+    store.close()
+    assert load_tasks(file_path=fp).get(1)["title"] == "Closed"
+    store.change(update_task, 2, {"title": "After close"})
+    assert load_tasks(file_path=fp).get(2)["title"] == "After close"
+
+ # Pending write-behind changes are replayed onto a store written elsewhere instead of being dropped
+def test_task_store_replays_pending_changes(tmp_path, sample_tasks):
+    fp = str(tmp_path / "tasks.json")
+    save_tasks(sample_tasks, file_path=fp)
+    store = TaskStore(fp, flush_ms=60000)
+    store.change(toggle_completed, 1)
+    store.change(bulk_delete, [3])
+    new = dict(sample_tasks[0], id=store.tasks.next_id, title="Added here")
+    store.tasks.append(new)
+    store.change(append_task_change, "add", new)
+    outside = load_tasks(file_path=fp)
+    outside.update_by_id(2, {"title": "Edited elsewhere"})
+    outside.update_by_id(1, {"title": "Lost to ours"})
+    outside.append(dict(sample_tasks[0], id=9, title="Added elsewhere"))
+    save_tasks(outside, file_path=fp)
+    store.flush()
+    assert store.error is None and not store.dirty
+    saved = load_tasks(file_path=fp)
+    assert saved == store.tasks
+    assert [t["title"] for t in saved] == ["Old Task", "Edited elsewhere", "Added elsewhere", "Added here"]
+    assert saved.get(1)["completed"] is True and saved.get(3) is None
+    store.close()
+
+ # The background writer saves pending changes on its own once the interval has passed
+def test_task_store_background_flush(tmp_path, sample_tasks):
+    fp = str(tmp_path / "tasks.json")
+    save_tasks(sample_tasks, file_path=fp)
+    store = TaskStore(fp, flush_ms=10)
+    store.change(toggle_completed, 1)
+    deadline = time.monotonic() + 5
+    while store.dirty and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert load_tasks(file_path=fp).get(1)["completed"] is True
+    store.close()
+    with pytest.raises(ValueError):
+        TaskStore(str(tmp_path / "tasks.db"), engine="sqlite", flush_ms=10)
+
+ # Saving writes a copy outside the store lock; a change made meanwhile is kept for the next save
+def test_task_store_writes_outside_lock(tmp_path, sample_tasks, monkeypatch):
+    fp = str(tmp_path / "tasks.json")
+    save_tasks(sample_tasks, file_path=fp)
+    store = TaskStore(fp, flush_ms=60000)
+    store.change(toggle_completed, 1)
+    real_save = tasks_module.save_tasks
+
+    def save(*args, **kwargs):
+        changer = threading.Thread(target=store.change, args=(update_task, 2, {"title": "Meanwhile"}))
+        changer.start()
+        changer.join(5)
+        assert not changer.is_alive()
+        return real_save(*args, **kwargs)
+
+    monkeypatch.setattr(tasks_module, "save_tasks", save)
+    store.flush()
+    saved = load_tasks(file_path=fp)
+    assert saved.get(1)["completed"] is True and saved.get(2)["title"] == "Today Task"
+    assert store.dirty and store.tasks.get(2)["title"] == "Meanwhile"
+    monkeypatch.setattr(tasks_module, "save_tasks", real_save)
+    store.close()
+    assert load_tasks(file_path=fp) == store.tasks
+
+ # A write-behind journal store logs only the changed tasks instead of rewriting the snapshot
+def test_task_store_journal_flush_appends(tmp_path, sample_tasks):
+    fp = str(tmp_path / "tasks.json")
+    save_tasks(sample_tasks, file_path=fp, engine="journal")
+    snapshot = (tmp_path / "tasks.json").read_text()
+    store = TaskStore(fp, engine="journal", flush_ms=60000)
+    store.change(toggle_completed, 2)
+    store.change(bulk_delete, [1])
+    new = dict(sample_tasks[0], id=store.tasks.next_id, title="Added")
+    store.tasks.append(new)
+    store.change(append_task_change, "add", new)
+    store.flush()
+    assert (tmp_path / "tasks.json").read_text() == snapshot
+    assert len((tmp_path / "tasks.json.log").read_text().splitlines()) == 3
+    assert load_tasks(file_path=fp, engine="journal") == store.tasks
+    assert [t["id"] for t in store.tasks] == [2, 3, 4]
+    store.close()
+
+ # save_tasks refuses to overwrite a store that changed since the tasks were loaded
+def test_save_tasks_conflict(tmp_path, sample_tasks):
+    fp = str(tmp_path / "tasks.json")
+    save_tasks(sample_tasks, file_path=fp)
+    first, second = load_tasks(file_path=fp), load_tasks(file_path=fp)
+    first.remove_by_id(1)
+    save_tasks(first, file_path=fp)
+    second.remove_by_id(2)
+    with pytest.raises(TaskConflictError):
+        save_tasks(second, file_path=fp)
+    assert [t["id"] for t in load_tasks(file_path=fp)] == [2, 3]
+    save_tasks(list(second), file_path=fp)
+    assert [t["id"] for t in load_tasks(file_path=fp)] == [1, 3]
+    # A stale list can still be saved as a copy in another file
+    copy = str(tmp_path / "copy.json")
+    save_tasks(second, file_path=copy)
+    assert [t["id"] for t in load_tasks(file_path=copy)] == [1, 3]
+
+ # Saved files get the mode open() gives new files and keep the mode of the file they replace
+def test_save_tasks_file_mode(tmp_path, sample_tasks):
+    plain = tmp_path / "plain.json"
+    plain.write_text("[]")
+    fp = tmp_path / "tasks.json"
+    save_tasks(sample_tasks, file_path=str(fp))
+    assert fp.stat().st_mode == plain.stat().st_mode
+    fp.chmod(0o640)
+    save_tasks(sample_tasks[:1], file_path=str(fp))
+    assert fp.stat().st_mode & 0o7777 == 0o640
+
+ # A write that fails midway leaves the previous file intact and no temp file behind
+def test_save_tasks_atomic(tmp_path, sample_tasks, monkeypatch):
+    fp = tmp_path / "tasks.json"
+    save_tasks(sample_tasks, file_path=str(fp))
+    before = fp.read_text()
+    def crash(obj, f, **kwargs):
+        f.write("[{")
+        raise OSError("disk full")
+    monkeypatch.setattr(tasks_module.json, "dump", crash)
+    with pytest.raises(OSError):
+        save_tasks(sample_tasks[:1], file_path=str(fp))
+    assert fp.read_text() == before
+    assert not list(tmp_path.glob("*.tmp"))
+
+def _update_in_process(fp, n):
+    for i in range(5):
+        update_task(1, {f"p{n}_{i}": True}, file_path=fp)
+
+ # Writers in separate processes serialize on the lock file and lose no update
+def test_concurrent_process_writers(tmp_path, sample_tasks):
+    fp = str(tmp_path / "tasks.json")
+    save_tasks(sample_tasks, file_path=fp)
+    # The platform's default start method: fork is missing on Windows and no longer the default on macOS
+    ctx = multiprocessing.get_context()
+    procs = [ctx.Process(target=_update_in_process, args=(fp, n)) for n in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert [p.exitcode for p in procs] == [0, 0, 0]
+    task = load_tasks(file_path=fp).get(1)
+    assert all(task[f"p{n}_{i}"] for n in range(3) for i in range(5))
+
+ # Task records read, write, copy and compare like the task dicts they replace
+def test_task_record_dict_access(sample_tasks):
+    records = [Task(t) for t in sample_tasks]
+    assert records == sample_tasks and sample_tasks == records
+    task = records[0]
+    assert task["due_date"] == sample_tasks[0]["due_date"] and task.get("missing") is None
+    assert Task(priority="".join(["L", "ow"])).priority is task.priority == "Low"
+    edited = edit_task(records, task["id"], {"title": "Edited", "note": "kept"})
+    assert find_task(edited, task["id"]) == dict(sample_tasks[0], title="Edited", note="kept")
+    assert task["title"] == sample_tasks[0]["title"]
+    task["due_date"] = "someday"
+    del task["description"]
+    assert dict(task) == {k: v for k, v in dict(sample_tasks[0], due_date="someday").items() if k != "description"}
+    assert sort_tasks_by_due_date(records[1:]) == sort_tasks_by_due_date(sample_tasks[1:])
+    assert filter_tasks_by_completion(records[1:], False) == filter_tasks_by_completion(sample_tasks[1:], False)
+
+ # A TaskTable holds tasks column by column and still saves and filters like a list of dicts
+def test_task_table_columns(tmp_path, sample_tasks):
+    odd = {"id": 9, "title": "Odd", "priority": 1, "due_date": "soon", "completed": "no", "tag": "x"}
+    table = TaskTable(sample_tasks + [odd])
+    assert list(table) == sample_tasks + [odd] and len(table) == 4
+    assert table.names("priority")[1:] == ["High", "Medium", "Low"]
+    assert get_overdue_tasks(table) == get_overdue_tasks(sample_tasks)
+    table[0] = dict(table[0], completed=True)
+    del table[-1]
+    assert table[0]["completed"] is True and len(table) == 3
+    fp = str(tmp_path / "tasks.json")
+    save_tasks(table, file_path=fp, format="compact")
+    assert load_tasks(file_path=fp) == table
+    assert TaskTable(iter_tasks(file_path=fp)) == table
+    with pytest.raises(ValueError):
+        table.append({"title": "No id"})
+
+ # TaskColumns answers the filter, overdue and sort functions with column masks, with or without NumPy
+@pytest.mark.parametrize("numpy", [True, False])
+def test_task_columns_queries(sample_tasks, monkeypatch, numpy):
+    if not numpy:
+        monkeypatch.setattr(tasks_module, "np", None)
+    tasks = sample_tasks + [{"id": 4, "title": "Undated", "priority": "High", "category": "Home", "completed": True}]
+    for source in (tasks, TaskTable(tasks)):
+        columns = TaskColumns(source)
+        assert filter_tasks_by_priority(columns, "High") == filter_tasks_by_priority(tasks, "High")
+        assert filter_tasks_by_category(columns, "Home") == [tasks[3]]
+        assert filter_tasks_by_category(columns, "Nope") == []
+        assert filter_tasks_by_completion(columns, False) == tasks[:3]
+        assert get_overdue_tasks(columns) == get_overdue_tasks(tasks)
+        assert sort_tasks_by_due_date(columns, ascending=False) == sort_tasks_by_due_date(tasks, ascending=False)
+        counts = columns.counts()
+        assert (counts.total, counts.completed, counts.overdue) == (4, 1, 1)
+        assert counts.by_category == {"Work": 1, "Personal": 1, "Other": 1, "Home": 1}
+        assert counts.by_priority == {"High": 2, "Medium": 1, "Low": 1}
+
+ # TaskList keeps its counts and completion history current through every storage call
+def test_task_counts_incremental(tmp_path, sample_tasks):
+    fp = str(tmp_path / "tasks.json")
+    save_tasks(sample_tasks, file_path=fp)
+    tasks = load_tasks(file_path=fp)
+    counts = get_task_counts(tasks)
+    assert (counts.total, counts.completed, counts.overdue) == (3, 0, 1)
+    toggle_completed(1, file_path=fp, tasks=tasks)
+    update_task(2, {"category": "Work", "due_date": "2000-01-01"}, file_path=fp, tasks=tasks)
+    bulk_delete([3], file_path=fp, tasks=tasks)
+    counts = get_task_counts(tasks)
+    assert counts == get_task_counts(list(tasks)) == get_task_counts(load_tasks(file_path=fp))
+    assert (counts.total, counts.completed, counts.overdue) == (2, 1, 1)
+    assert counts.by_category == {"Work": 2} and counts.by_priority == {"Medium": 1, "Low": 1}
+    day = sample_tasks[0]["created_at"][:10]
+    assert get_completion_history(tasks) == get_completion_history(list(tasks)) == [(day, 2, 1)]
+    db_path = str(tmp_path / "tasks.db")
+    save_tasks(list(tasks), file_path=db_path, engine="sqlite")
+    db = open_task_db(db_path)
+    assert get_task_counts(db) == counts and get_completion_history(db) == [(day, 2, 1)]
+
+ # TaskQuery gives the same results from a plain list, a TaskList, a TaskColumns and a TaskDatabase
+@pytest.mark.parametrize("source", ["list", "tasklist", "columns", "sqlite"])
+def test_task_query(tmp_path, source):
+    rows = [
+        {"id": i, "title": f"T{i:02}", "description": "", "priority": ("High", "Low")[i % 2],
+         "category": ("Work", "Home", "Other")[i % 3], "due_date": f"2025-01-{i % 7 + 10}",
+         "completed": i % 4 == 0, "created_at": ""}
+        for i in range(1, 41)
+    ]
+    tasks = rows
+    if source == "tasklist":
+        tasks = TaskList(rows)
+    elif source == "columns":
+        tasks = TaskColumns(rows)
+    elif source == "sqlite":
+        tasks = open_task_db(str(tmp_path / "tasks.db"))
+        tasks.replace_all(rows)
+    open_work = [t for t in rows if t["category"] == "Work" and not t["completed"]]
+    query = TaskQuery(tasks).where(category="Work").completed(False)
+    ordered = query.order_by("due_date").all()
+    assert ordered == sorted(open_work, key=lambda t: (t["due_date"], t["id"]))
+    assert query.order_by("due_date").limit(3).all() == ordered[:3]
+    latest = query.order_by("due_date", ascending=False).all()
+    # rows are in id order, so a stable sort keeps same-day tasks in id order as the indexes do
+    assert latest == sorted(open_work, key=lambda t: t["due_date"], reverse=True)
+    assert query.order_by("due_date", ascending=False).limit(3).all() == latest[:3]
+    assert TaskQuery(tasks).order_by("due_date", ascending=False).limit(7).all() == sorted(
+        rows, key=lambda t: t["due_date"], reverse=True)[:7]
+    assert query.limit(2).all() == open_work[:2]
+    ranged = query.where(priority="Low").due_from("2025-01-14").due_before("2025-01-16")
+    assert ranged.all() == [t for t in open_work if t["priority"] == "Low" and "2025-01-14" <= t["due_date"] < "2025-01-16"]
+    top = query.where(lambda t: t["id"] > 10).order_by("title", ascending=False).limit(2)
+    assert [t["id"] for t in top] == [39, 33]
+    assert TaskQuery(tasks).where(title="T05").all() == [rows[4]]
+
+ # next_due picks the first k by due date, breaking ties by priority then id, from every kind of source
+@pytest.mark.parametrize("source", ["list", "tasklist", "columns", "sqlite"])
+def test_next_due(tmp_path, source):
+    rows = [
+        {"id": i, "title": f"T{i}", "priority": ("Low", "High", "Medium")[i % 3],
+         "due_date": f"2025-01-{10 + i % 4}", "completed": False}
+        for i in range(1, 13)
+    ]
+    tasks = rows
+    if source == "tasklist":
+        tasks = TaskList(rows)
+    elif source == "columns":
+        tasks = TaskColumns(rows)
+    elif source == "sqlite":
+        tasks = open_task_db(str(tmp_path / "tasks.db"))
+        tasks.replace_all(rows)
+    assert [t["id"] for t in next_due(tasks, 5)] == [4, 8, 12, 1, 5]
+    assert [t["id"] for t in next_due(tasks, 4, ascending=False)] == [7, 11, 3, 10]
+    assert next_due(tasks, 20) == sorted(rows, key=lambda t: (t["due_date"], ("High", "Medium", "Low").index(t["priority"]), t["id"]))
+    assert next_due(tasks, 0) == []
+    assert [t["id"] for t in next_due(tasks, 3, priority="Low", due_from="2025-01-11")] == [9, 6, 3]
+    assert [t["id"] for t in next_due(tasks, 2, False, priority="Low", due_before="2025-01-13")] == [6, 9]
+
+ # A limited task view orders only the first tasks of each section and still counts every match
+def test_task_view_limit(sample_tasks):
+    tasks = TaskList(sample_tasks + [dict(sample_tasks[2], id=4, priority="Low"), dict(sample_tasks[2], id=5)])
+    view = get_task_view(tasks, limit=2)
+    assert len(view.filtered) == 5
+    assert [t["id"] for t in view.upcoming] == [3, 5]
+    assert [t["id"] for t in get_task_view(tasks).upcoming] == [3, 4, 5]
+    assert [t["id"] for t in get_task_view(tasks, ascending=False, limit=1).upcoming] == [3]
+
+ # A page matches that page of the full view: one COUNT(*) and one LIMIT/OFFSET query on sqlite,
+ # index counts and next_due without building the filtered list on a TaskList
+@pytest.mark.parametrize("source", ["sqlite", "tasklist", "list"])
+@pytest.mark.parametrize("options", [{}, {"ascending": False, "show_completed": True}, {"search": "ASK 1"}])
+def test_task_page(tmp_path, monkeypatch, source, options):
+    today = "2025-01-12"
+    rows = [
+        {"id": i, "title": f"Task {i}", "priority": ("Low", "High", "Medium")[i % 3],
+         "due_date": f"2025-01-{10 + i % 5}", "completed": i % 4 == 0}
+        for i in range(1, 15)
+    ]
+    # A search on a TaskList is ranked, so its page follows its own full view
+    view = get_task_view(TaskList(rows) if source == "tasklist" else rows, limit=len(rows), today=today, **options)
+    everything = list(view.overdue + view.due_today + view.upcoming)
+    tasks = rows
+    if source == "sqlite":
+        tasks = open_task_db(str(tmp_path / "tasks.db"))
+        tasks.replace_all(rows)
+    elif source == "tasklist":
+        tasks = TaskList(rows)
+        if not options.get("search"):
+            monkeypatch.setattr(TaskQuery, "all", None)
+    for page in (1, 2, 3):
+        result = tasks_module.get_task_page(tasks, page, 4, today=today, **options)
+        assert result.total == len(view.filtered)
+        start = (min(page, -(-result.total // 4)) - 1) * 4
+        assert result.overdue + result.due_today + result.upcoming == everything[start:start + 4]
+        assert [list(p) for p in result[1:]] == [[t for t in part if t in everything[start:start + 4]] for part in view[1:]]
+
+ # A limited view reads each section through next_due with its own date range and agrees across sources
+@pytest.mark.parametrize("options", [
+    {}, {"ascending": False}, {"show_completed": True}, {"category": "Other"}, {"priority": "Low", "show_completed": True},
+])
+def test_task_view_limit_sections(tmp_path, sample_tasks, monkeypatch, options):
+    sample_tasks[1]["completed"] = True
+    sample_tasks += [dict(sample_tasks[0], id=4, completed=True), dict(sample_tasks[2], id=5, priority="Low")]
+    expected = get_task_view(sample_tasks, limit=2, **options)
+    db = open_task_db(str(tmp_path / "tasks.db"))
+    db.replace_all(sample_tasks)
+    monkeypatch.setattr(tasks_module, "partition_by_due", None)
+    for source in (TaskList(sample_tasks), db):
+        view = get_task_view(source, limit=2, **options)
+        assert view[1:] == expected[1:]
+        assert sorted(t["id"] for t in view.filtered) == sorted(t["id"] for t in expected.filtered)
+